@@ -57,9 +57,9 @@ export default function ReportsPage() {
             <Download className="w-4 h-4" />
             Export CSV
           </Button>
-          <Button onClick={() => handleExport("pdf")} className="gap-2">
+          <Button onClick={() => handleExport("ndjson")} className="gap-2">
             <Download className="w-4 h-4" />
-            Export PDF
+            Export NDJSON
           </Button>
         </CardContent>
       </Card>
@@ -15,7 +15,7 @@ export const adminApi = {
 
   // Users endpoints
   getUsers: async (page = 1, limit = 10, filters = {}) => {
-    const params = new URLSearchParams({ page: String(page), limit: String(limit), ...filters })
+    const params = new URLSearchParams({ page: String(page), limit: String(limit), include_total: "true", ...filters })
     const res = await apiCall(`${API_BASE}/admin/users?${params}`)
     return res.json()
   },
@@ -40,6 +40,14 @@ export const adminApi = {
     return res.json()
   },
 
+  bulkUpdateUsers: async (data: any) => {
+    const res = await apiCall(`${API_BASE}/admin/users/bulk`, {
+      method: "POST",
+      body: JSON.stringify(data),
+    })
+    return res.json()
+  },
+
   resetUserPassword: async (id: string) => {
     const res = await apiCall(`${API_BASE}/admin/users/${id}/reset-password`, {
       method: "POST",
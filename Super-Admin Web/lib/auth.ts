@@ -10,6 +10,7 @@ export const setAuthToken = (token: string) => {
 export const removeAuthToken = () => {
   localStorage.removeItem("admin_token")
   localStorage.removeItem("admin_user")
+  localStorage.removeItem("last_write")
 }
 
 export const getAuthUser = () => {
@@ -22,6 +23,17 @@ export const setAuthUser = (user: any) => {
   localStorage.setItem("admin_user", JSON.stringify(user))
 }
 
+// Time of our last write, as handed out by the API in X-Last-Write. Sending it
+// back keeps our reads on the primary database until the replica has caught up
+const getLastWrite = () => {
+  if (typeof window === "undefined") return null
+  return localStorage.getItem("last_write")
+}
+
+const setLastWrite = (value: string) => {
+  localStorage.setItem("last_write", value)
+}
+
 // API helper with JWT
 export const apiCall = async (endpoint: string, options: RequestInit = {}) => {
   const token = getAuthToken()
@@ -34,11 +46,21 @@ export const apiCall = async (endpoint: string, options: RequestInit = {}) => {
     headers["Authorization"] = `Bearer ${token}`
   }
 
+  const lastWrite = getLastWrite()
+  if (lastWrite) {
+    headers["X-Last-Write"] = lastWrite
+  }
+
   const response = await fetch(endpoint, {
     ...options,
     headers,
   })
 
+  const written = response.headers.get("X-Last-Write")
+  if (written) {
+    setLastWrite(written)
+  }
+
   if (response.status === 401) {
     removeAuthToken()
     window.location.href = "/"
@@ -0,0 +1,15 @@
+from alembic import op
+
+revision = "20261018_000003"
+down_revision = "20251115_000002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves ORDER BY created_at DESC, id DESC and the (created_at, id) < cursor seek
+    op.create_index("ix_users_created_at_id", "users", ["created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_created_at_id", table_name="users")
@@ -0,0 +1,33 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_000004"
+down_revision = "20261018_000003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Exact email fast path of the admin search
+    op.create_index("ix_users_email_lower", "users", [sa.text("lower(email)")], unique=False)
+
+    if op.get_context().dialect.name != "postgresql":
+        return
+
+    # Trigram indexes serve ILIKE '%term%' and similarity() ranking
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_users_name_trgm", "users", ["name"],
+        postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_users_email_trgm", "users", ["email"],
+        postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        op.drop_index("ix_users_email_trgm", table_name="users")
+        op.drop_index("ix_users_name_trgm", table_name="users")
+    op.drop_index("ix_users_email_lower", table_name="users")
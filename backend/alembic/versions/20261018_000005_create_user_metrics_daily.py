@@ -0,0 +1,34 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_000005"
+down_revision = "20261018_000004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_metrics_daily",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("new_users", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("active_users", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("paid_users", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("last_seen_users", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_table(
+        "rollup_state",
+        sa.Column("name", sa.String(64), primary_key=True),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+    )
+    # The incremental job finds changed rows by updated_at and rescans recent last_active days
+    op.create_index("ix_users_updated_at", "users", ["updated_at"], unique=False)
+    op.create_index("ix_users_last_active", "users", ["last_active"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_last_active", table_name="users")
+    op.drop_index("ix_users_updated_at", table_name="users")
+    op.drop_table("rollup_state")
+    op.drop_table("user_metrics_daily")
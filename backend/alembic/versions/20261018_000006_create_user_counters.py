@@ -0,0 +1,137 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_000006"
+down_revision = "20261018_000005"
+branch_labels = None
+depends_on = None
+
+POSTGRESQL_FUNCTION = """
+CREATE OR REPLACE FUNCTION user_counters_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM user_counters;
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO user_counters AS c (status, role, subscription_plan, user_count)
+        SELECT status::text, role::text, coalesce(subscription_plan, ''), count(*)
+        FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, role, subscription_plan)
+        DO UPDATE SET user_count = c.user_count + EXCLUDED.user_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO user_counters AS c (status, role, subscription_plan, user_count)
+        SELECT status::text, role::text, coalesce(subscription_plan, ''), -count(*)
+        FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, role, subscription_plan)
+        DO UPDATE SET user_count = c.user_count + EXCLUDED.user_count;
+    ELSE
+        INSERT INTO user_counters AS c (status, role, subscription_plan, user_count)
+        SELECT status, role, subscription_plan, sum(delta)
+        FROM (
+            SELECT status::text, role::text, coalesce(subscription_plan, '') AS subscription_plan, 1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT status::text, role::text, coalesce(subscription_plan, ''), -1
+            FROM old_rows
+        ) changes
+        GROUP BY 1, 2, 3 HAVING sum(delta) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (status, role, subscription_plan)
+        DO UPDATE SET user_count = c.user_count + EXCLUDED.user_count;
+    END IF;
+    RETURN NULL;
+END $$
+"""
+
+POSTGRESQL_TRIGGERS = [
+    "CREATE TRIGGER user_counters_insert AFTER INSERT ON users "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION user_counters_apply()",
+    "CREATE TRIGGER user_counters_update AFTER UPDATE ON users "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION user_counters_apply()",
+    "CREATE TRIGGER user_counters_delete AFTER DELETE ON users "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION user_counters_apply()",
+    "CREATE TRIGGER user_counters_truncate AFTER TRUNCATE ON users "
+    "FOR EACH STATEMENT EXECUTE FUNCTION user_counters_apply()",
+]
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER user_counters_insert AFTER INSERT ON users BEGIN
+        INSERT INTO user_counters (status, role, subscription_plan, user_count)
+        SELECT NEW.status, NEW.role, coalesce(NEW.subscription_plan, ''), 0
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_counters
+            WHERE status = NEW.status AND role = NEW.role AND subscription_plan = coalesce(NEW.subscription_plan, '')
+        );
+        UPDATE user_counters SET user_count = user_count + 1
+        WHERE status = NEW.status AND role = NEW.role AND subscription_plan = coalesce(NEW.subscription_plan, '');
+    END
+    """,
+    """
+    CREATE TRIGGER user_counters_update
+    AFTER UPDATE OF status, role, subscription_plan ON users
+    WHEN OLD.status IS NOT NEW.status OR OLD.role IS NOT NEW.role
+        OR OLD.subscription_plan IS NOT NEW.subscription_plan
+    BEGIN
+        UPDATE user_counters SET user_count = user_count - 1
+        WHERE status = OLD.status AND role = OLD.role AND subscription_plan = coalesce(OLD.subscription_plan, '');
+        INSERT INTO user_counters (status, role, subscription_plan, user_count)
+        SELECT NEW.status, NEW.role, coalesce(NEW.subscription_plan, ''), 0
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_counters
+            WHERE status = NEW.status AND role = NEW.role AND subscription_plan = coalesce(NEW.subscription_plan, '')
+        );
+        UPDATE user_counters SET user_count = user_count + 1
+        WHERE status = NEW.status AND role = NEW.role AND subscription_plan = coalesce(NEW.subscription_plan, '');
+    END
+    """,
+    """
+    CREATE TRIGGER user_counters_delete AFTER DELETE ON users BEGIN
+        UPDATE user_counters SET user_count = user_count - 1
+        WHERE status = OLD.status AND role = OLD.role AND subscription_plan = coalesce(OLD.subscription_plan, '');
+    END
+    """,
+]
+
+TRIGGER_NAMES = ["user_counters_insert", "user_counters_update", "user_counters_delete", "user_counters_truncate"]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_counters",
+        sa.Column("status", sa.String(20), primary_key=True),
+        sa.Column("role", sa.String(20), primary_key=True),
+        sa.Column("subscription_plan", sa.String(50), primary_key=True),
+        sa.Column("user_count", sa.BigInteger, nullable=False, server_default="0"),
+    )
+
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        # Block writers between the backfill and the triggers going live
+        op.execute("LOCK TABLE users IN SHARE MODE")
+        op.execute(
+            "INSERT INTO user_counters (status, role, subscription_plan, user_count) "
+            "SELECT status::text, role::text, coalesce(subscription_plan, ''), count(*) "
+            "FROM users GROUP BY 1, 2, 3"
+        )
+        op.execute(POSTGRESQL_FUNCTION)
+        for statement in POSTGRESQL_TRIGGERS:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        op.execute(
+            "INSERT INTO user_counters (status, role, subscription_plan, user_count) "
+            "SELECT status, role, coalesce(subscription_plan, ''), count(*) "
+            "FROM users GROUP BY 1, 2, 3"
+        )
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        for name in TRIGGER_NAMES:
+            op.execute(f"DROP TRIGGER IF EXISTS {name} ON users")
+        op.execute("DROP FUNCTION IF EXISTS user_counters_apply()")
+    elif dialect == "sqlite":
+        for name in TRIGGER_NAMES:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table("user_counters")
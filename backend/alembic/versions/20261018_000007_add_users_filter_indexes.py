@@ -0,0 +1,32 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_000007"
+down_revision = "20261018_000006"
+branch_labels = None
+depends_on = None
+
+# Partial indexes: only the minority values of each column are indexed
+PARTIAL_INDEXES = [
+    ("ix_users_status_id", ["status", "id"], "status <> 'active'"),
+    ("ix_users_role_id", ["role", "id"], "role <> 'user'"),
+    ("ix_users_paid_plan_id", ["subscription_plan", "id"], "subscription_plan <> 'Free'"),
+    ("ix_users_paid_plan_valid_until", ["plan_valid_until", "id"], "subscription_plan <> 'Free'"),
+]
+
+
+def upgrade() -> None:
+    # Duplicates the index behind the uq_users_email constraint
+    op.drop_index("ix_users_email", table_name="users")
+
+    for name, columns, where in PARTIAL_INDEXES:
+        op.create_index(
+            name, "users", columns, unique=False,
+            postgresql_where=sa.text(where), sqlite_where=sa.text(where),
+        )
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(PARTIAL_INDEXES):
+        op.drop_index(name, table_name="users")
+    op.create_index("ix_users_email", "users", ["email"], unique=False)
@@ -0,0 +1,207 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_000008"
+down_revision = "20261018_000007"
+branch_labels = None
+depends_on = None
+
+# The plans the API used to hard-code; prices in cents
+PLANS = [
+    ("Free", 0, ["Basic features", "5 projects", "Community support"]),
+    ("Premium", 2999, ["All Free features", "Unlimited projects", "Priority support", "Advanced analytics"]),
+    ("Enterprise", 9999, ["All Premium features", "Custom integrations", "Dedicated support", "SLA guarantee"]),
+]
+
+POSTGRESQL_FUNCTION = """
+CREATE OR REPLACE FUNCTION revenue_daily_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM revenue_daily;
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO revenue_daily AS r (day, plan_id, revenue_cents, payment_count)
+        SELECT (paid_at AT TIME ZONE 'UTC')::date, plan_id, sum(amount_cents), count(*)
+        FROM new_rows WHERE status = 'succeeded' GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (day, plan_id) DO UPDATE SET
+            revenue_cents = r.revenue_cents + EXCLUDED.revenue_cents,
+            payment_count = r.payment_count + EXCLUDED.payment_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO revenue_daily AS r (day, plan_id, revenue_cents, payment_count)
+        SELECT (paid_at AT TIME ZONE 'UTC')::date, plan_id, -sum(amount_cents), -count(*)
+        FROM old_rows WHERE status = 'succeeded' GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (day, plan_id) DO UPDATE SET
+            revenue_cents = r.revenue_cents + EXCLUDED.revenue_cents,
+            payment_count = r.payment_count + EXCLUDED.payment_count;
+    ELSE
+        -- Refunds and corrections: take out the old row, add the new one
+        INSERT INTO revenue_daily AS r (day, plan_id, revenue_cents, payment_count)
+        SELECT day, plan_id, sum(amount_cents), sum(payments)
+        FROM (
+            SELECT (paid_at AT TIME ZONE 'UTC')::date AS day, plan_id, amount_cents::bigint AS amount_cents, 1 AS payments
+            FROM new_rows WHERE status = 'succeeded'
+            UNION ALL
+            SELECT (paid_at AT TIME ZONE 'UTC')::date, plan_id, -amount_cents::bigint, -1
+            FROM old_rows WHERE status = 'succeeded'
+        ) changes
+        GROUP BY 1, 2 HAVING sum(amount_cents) <> 0 OR sum(payments) <> 0 ORDER BY 1, 2
+        ON CONFLICT (day, plan_id) DO UPDATE SET
+            revenue_cents = r.revenue_cents + EXCLUDED.revenue_cents,
+            payment_count = r.payment_count + EXCLUDED.payment_count;
+    END IF;
+    RETURN NULL;
+END $$
+"""
+
+POSTGRESQL_TRIGGERS = [
+    "CREATE TRIGGER revenue_daily_insert AFTER INSERT ON payments "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION revenue_daily_apply()",
+    "CREATE TRIGGER revenue_daily_update AFTER UPDATE ON payments "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION revenue_daily_apply()",
+    "CREATE TRIGGER revenue_daily_delete AFTER DELETE ON payments "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION revenue_daily_apply()",
+    "CREATE TRIGGER revenue_daily_truncate AFTER TRUNCATE ON payments "
+    "FOR EACH STATEMENT EXECUTE FUNCTION revenue_daily_apply()",
+]
+
+SQLITE_ADD = """
+        INSERT INTO revenue_daily (day, plan_id, revenue_cents, payment_count)
+        SELECT date(NEW.paid_at), NEW.plan_id, 0, 0
+        WHERE NOT EXISTS (SELECT 1 FROM revenue_daily WHERE day = date(NEW.paid_at) AND plan_id = NEW.plan_id);
+        UPDATE revenue_daily SET revenue_cents = revenue_cents + NEW.amount_cents, payment_count = payment_count + 1
+        WHERE day = date(NEW.paid_at) AND plan_id = NEW.plan_id;
+"""
+
+SQLITE_SUBTRACT = """
+        UPDATE revenue_daily SET revenue_cents = revenue_cents - OLD.amount_cents, payment_count = payment_count - 1
+        WHERE day = date(OLD.paid_at) AND plan_id = OLD.plan_id;
+"""
+
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER revenue_daily_insert AFTER INSERT ON payments "
+    f"WHEN NEW.status = 'succeeded' BEGIN {SQLITE_ADD} END",
+    "CREATE TRIGGER revenue_daily_update_old AFTER UPDATE OF status, amount_cents, paid_at, plan_id ON payments "
+    f"WHEN OLD.status = 'succeeded' BEGIN {SQLITE_SUBTRACT} END",
+    "CREATE TRIGGER revenue_daily_update_new AFTER UPDATE OF status, amount_cents, paid_at, plan_id ON payments "
+    f"WHEN NEW.status = 'succeeded' BEGIN {SQLITE_ADD} END",
+    "CREATE TRIGGER revenue_daily_delete AFTER DELETE ON payments "
+    f"WHEN OLD.status = 'succeeded' BEGIN {SQLITE_SUBTRACT} END",
+]
+
+TRIGGER_NAMES = {
+    "postgresql": ["revenue_daily_insert", "revenue_daily_update", "revenue_daily_delete", "revenue_daily_truncate"],
+    "sqlite": ["revenue_daily_insert", "revenue_daily_update_old", "revenue_daily_update_new", "revenue_daily_delete"],
+}
+
+# Users already on a paid plan get one subscription from their signup;
+# plans that lapsed before today end on their last valid day
+BACKFILL_SUBSCRIPTIONS = """
+INSERT INTO subscriptions (user_id, plan_id, status, started_at, current_period_end, ended_at, created_at, updated_at)
+SELECT u.id, p.id,
+    CASE WHEN u.plan_valid_until < CURRENT_DATE THEN {expired} ELSE {active} END,
+    u.created_at, u.plan_valid_until,
+    CASE WHEN u.plan_valid_until < CURRENT_DATE THEN {ended_at} END,
+    CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+FROM users u JOIN plans p ON p.name = u.subscription_plan
+WHERE p.price_cents > 0
+ORDER BY u.id
+"""
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+
+    plans = op.create_table(
+        "plans",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("price_cents", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("currency", sa.String(3), nullable=False, server_default="USD"),
+        sa.Column("billing_interval", sa.String(20), nullable=False, server_default="monthly"),
+        sa.Column("features", sa.JSON, nullable=False),
+        sa.Column("is_active", sa.Boolean, nullable=False, server_default=sa.true()),
+        sa.Column("sort_order", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("name", name="uq_plans_name"),
+    )
+    op.bulk_insert(plans, [
+        {"name": name, "price_cents": price, "features": features, "sort_order": position}
+        for position, (name, price, features) in enumerate(PLANS)
+    ])
+
+    op.create_table(
+        "subscriptions",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("plan_id", sa.Integer, sa.ForeignKey("plans.id"), nullable=False),
+        sa.Column("status", sa.Enum("active", "canceled", "expired", name="subscriptionstatus"), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("current_period_end", sa.Date(), nullable=True),
+        sa.Column("ended_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_subscriptions_started_at_id", "subscriptions", ["started_at", "id"])
+    op.create_index("ix_subscriptions_user_id_started_at", "subscriptions", ["user_id", "started_at"])
+    op.create_index("ix_subscriptions_active_user_id", "subscriptions", ["user_id"],
+                    postgresql_where=sa.text("status = 'active'"), sqlite_where=sa.text("status = 'active'"))
+    op.create_index("ix_subscriptions_ended_at", "subscriptions", ["ended_at", "started_at"],
+                    postgresql_where=sa.text("ended_at IS NOT NULL"), sqlite_where=sa.text("ended_at IS NOT NULL"))
+
+    op.create_table(
+        "payments",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer, "sqlite"), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("subscription_id", sa.Integer, sa.ForeignKey("subscriptions.id"), nullable=False),
+        sa.Column("plan_id", sa.Integer, sa.ForeignKey("plans.id"), nullable=False),
+        sa.Column("amount_cents", sa.Integer, nullable=False),
+        sa.Column("currency", sa.String(3), nullable=False, server_default="USD"),
+        sa.Column("status", sa.Enum("succeeded", "failed", "refunded", name="paymentstatus"), nullable=False),
+        sa.Column("paid_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_payments_succeeded_paid_at", "payments", ["paid_at", "user_id", "amount_cents"],
+                    postgresql_where=sa.text("status = 'succeeded'"), sqlite_where=sa.text("status = 'succeeded'"))
+    op.create_index("ix_payments_subscription_id_paid_at", "payments", ["subscription_id", "paid_at"])
+    op.create_index("ix_payments_user_id_paid_at", "payments", ["user_id", "paid_at"])
+
+    op.create_table(
+        "revenue_daily",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("plan_id", sa.Integer, primary_key=True),
+        sa.Column("revenue_cents", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("payment_count", sa.BigInteger, nullable=False, server_default="0"),
+    )
+
+    if dialect == "postgresql":
+        op.execute(BACKFILL_SUBSCRIPTIONS.format(
+            expired="'expired'::subscriptionstatus", active="'active'::subscriptionstatus",
+            ended_at="u.plan_valid_until::timestamptz",
+        ))
+        op.execute(POSTGRESQL_FUNCTION)
+        for statement in POSTGRESQL_TRIGGERS:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        op.execute(BACKFILL_SUBSCRIPTIONS.format(
+            expired="'expired'", active="'active'", ended_at="datetime(u.plan_valid_until)",
+        ))
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        for name in TRIGGER_NAMES[dialect]:
+            op.execute(f"DROP TRIGGER IF EXISTS {name} ON payments")
+        op.execute("DROP FUNCTION IF EXISTS revenue_daily_apply()")
+    elif dialect == "sqlite":
+        for name in TRIGGER_NAMES[dialect]:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    op.drop_table("revenue_daily")
+    op.drop_table("payments")
+    op.drop_table("subscriptions")
+    op.drop_table("plans")
+    if dialect == "postgresql":
+        op.execute("DROP TYPE IF EXISTS paymentstatus")
+        op.execute("DROP TYPE IF EXISTS subscriptionstatus")
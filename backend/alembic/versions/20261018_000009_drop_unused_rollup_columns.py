@@ -0,0 +1,20 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_000009"
+down_revision = "20261018_000008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Written by every rollup run but never read
+    with op.batch_alter_table("user_metrics_daily") as batch:
+        batch.drop_column("paid_users")
+        batch.drop_column("active_users")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user_metrics_daily") as batch:
+        batch.add_column(sa.Column("active_users", sa.Integer, nullable=False, server_default="0"))
+        batch.add_column(sa.Column("paid_users", sa.Integer, nullable=False, server_default="0"))
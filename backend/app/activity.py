@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy import DateTime, Integer, bindparam, column, func, or_, update, values
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+users = User.__table__
+
+
+def write_last_seen(db: Session, seen: List[Tuple[int, datetime]]) -> None:
+    """Move last_active forward for many users at once
+
+    last_active only ever increases, so flushes from several workers can
+    land in any order. updated_at is left alone: being active is not an
+    edit, and the metrics rollup and list ETags key off updated_at.
+    """
+    if db.bind.dialect.name == "postgresql":
+        batch = values(column("id", Integer), column("seen", DateTime(timezone=True)), name="seen").data(seen)
+        db.execute(
+            update(users)
+            .where(users.c.id == batch.c.id)
+            .values(last_active=func.greatest(users.c.last_active, batch.c.seen), updated_at=users.c.updated_at)
+        )
+        return
+    # SQLite cannot name the columns of a VALUES list; one executemany instead
+    db.execute(
+        update(users)
+        .where(
+            users.c.id == bindparam("user_id"),
+            or_(users.c.last_active.is_(None), users.c.last_active < bindparam("seen")),
+        )
+        .values(last_active=bindparam("seen"), updated_at=users.c.updated_at),
+        [{"user_id": user_id, "seen": at} for user_id, at in seen],
+    )
+
+
+class ActivityTracker:
+    """Coalesces per-request last-seen timestamps into periodic batched writes
+
+    touch() runs on every authenticated request but records a user at most
+    once per `interval`; flush() writes everything recorded since the last
+    flush in one statement. Each user costs at most one row update per
+    interval and worker, however many requests they make.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending: Dict[int, datetime] = {}
+        self._recorded_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, user_id: int) -> None:
+        now = time.monotonic()
+        recorded_at = self._recorded_at.get(user_id)
+        if recorded_at is not None and now - recorded_at < self.interval:
+            return
+        with self._lock:
+            self._recorded_at[user_id] = now
+            self._pending[user_id] = datetime.now(timezone.utc)
+
+    def drain(self) -> List[Tuple[int, datetime]]:
+        """Take the pending timestamps and forget users whose window has passed"""
+        now = time.monotonic()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._recorded_at = {
+                user_id: recorded_at for user_id, recorded_at in self._recorded_at.items()
+                if now - recorded_at < self.interval
+            }
+        # Id order keeps row lock order stable across concurrent flushes
+        return sorted(pending.items())
+
+    def flush(self, db: Session) -> int:
+        """Write the pending timestamps; returns the number of users written"""
+        seen = self.drain()
+        if not seen:
+            return 0
+        try:
+            write_last_seen(db, seen)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Retry with the next flush unless the user has been seen again since
+            with self._lock:
+                for user_id, at in seen:
+                    self._pending.setdefault(user_id, at)
+            raise
+        return len(seen)
+
+    def _flush_with_session(self) -> int:
+        db = SessionLocal()
+        try:
+            return self.flush(db)
+        finally:
+            db.close()
+
+    async def aflush(self) -> int:
+        """Flush on the threadpool, logging instead of raising on failure"""
+        try:
+            return await run_in_threadpool(self._flush_with_session)
+        except Exception:
+            logger.exception("Flushing last_active timestamps failed")
+            return 0
+
+    async def flush_periodically(self) -> None:
+        """Flush every interval until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.aflush()
+
+
+activity_tracker = ActivityTracker(interval=settings.ACTIVITY_FLUSH_SECONDS)
@@ -0,0 +1,283 @@
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy import BigInteger, Date, cast, distinct, func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.billing import Payment, PaymentStatus, RevenueDaily, Subscription, SubscriptionStatus
+from app.models.metrics import RollupState, UserCounter, UserMetricsDaily
+from app.models.user import User, UserStatus
+
+PAID_PLANS = ("Premium", "Enterprise")
+
+# Number of chart points and label format per reporting period
+PERIODS = {
+    "daily": (30, "%b %d"),
+    "weekly": (12, "%b %d"),
+    "monthly": (6, "%b"),
+}
+
+ACTIVE_WINDOW = timedelta(days=30)
+
+ROLLUP_NAME = "user_metrics_daily"
+
+logger = logging.getLogger(__name__)
+
+
+def _shift_month(day: date, months: int) -> date:
+    """Return the first day of the month `months` away from `day`"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def bucket_starts(period: str, today: date) -> List[date]:
+    """Start dates of the chart buckets for a period, oldest first"""
+    count, _ = PERIODS[period]
+    if period == "daily":
+        return [today - timedelta(days=i) for i in range(count - 1, -1, -1)]
+    if period == "weekly":
+        monday = today - timedelta(days=today.weekday())
+        return [monday - timedelta(weeks=i) for i in range(count - 1, -1, -1)]
+    return [_shift_month(today, -i) for i in range(count - 1, -1, -1)]
+
+
+def utc(column, dialect: str):
+    """Normalize a timestamptz column to UTC before taking its date parts"""
+    return func.timezone("UTC", column) if dialect == "postgresql" else column
+
+
+def bucket_expr(period: str, dialect: str, column):
+    """SQL expression truncating a date/timestamp column to the start of its bucket"""
+    if dialect == "postgresql":
+        unit = {"daily": "day", "weekly": "week", "monthly": "month"}[period]
+        return cast(func.date_trunc(unit, column), Date)
+    if period == "daily":
+        return func.date(column)
+    if period == "weekly":
+        # SQLite: move to the following Sunday, then back to that week's Monday
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", column)
+
+
+def rollup_fresh(db: Session) -> bool:
+    """Whether the daily rollup exists and was refreshed within METRICS_ROLLUP_MAX_AGE_SECONDS
+
+    Only scripts/refresh_metrics.py moves it forward; if that stops running,
+    readers fall back to the live queries rather than serve frozen numbers.
+    """
+    state = db.get(RollupState, ROLLUP_NAME)
+    if state is None:
+        return False
+    # SQLite hands back naive UTC timestamps
+    refreshed = state.watermark if state.watermark.tzinfo else state.watermark.replace(tzinfo=timezone.utc)
+    age = (datetime.now(timezone.utc) - refreshed).total_seconds()
+    if age > settings.METRICS_ROLLUP_MAX_AGE_SECONDS:
+        logger.warning("%s was last refreshed %.0fs ago; computing metrics live", ROLLUP_NAME, age)
+        return False
+    return True
+
+
+def as_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def user_totals(db: Session) -> Dict[str, int]:
+    """Total, active and paying users from the trigger-maintained user_counters"""
+    def total(*conditions):
+        # sum(bigint) is numeric on PostgreSQL
+        return cast(func.coalesce(func.sum(UserCounter.user_count).filter(*conditions), 0), BigInteger)
+
+    row = db.execute(
+        select(
+            total().label("total_users"),
+            total(UserCounter.status == UserStatus.active.value).label("active_users"),
+            total(UserCounter.subscription_plan.in_(PAID_PLANS)).label("active_subscriptions"),
+        )
+    ).one()
+    return dict(row._mapping)
+
+
+def user_breakdown(db: Session) -> Dict[str, Dict[str, int]]:
+    """User counts per status, role and plan from user_counters"""
+    rows = db.execute(
+        select(UserCounter.status, UserCounter.role, UserCounter.subscription_plan, UserCounter.user_count)
+        .where(UserCounter.user_count > 0)
+    ).all()
+    breakdown: Dict[str, Dict[str, int]] = {"status": {}, "role": {}, "plan": {}}
+    for status, role, plan, count in rows:
+        for dimension, key in (("status", status), ("role", role), ("plan", plan or "none")):
+            breakdown[dimension][key] = breakdown[dimension].get(key, 0) + count
+    return breakdown
+
+
+def headline_metrics(db: Session, now: datetime, series_start: datetime) -> Dict[str, int]:
+    """Headline counters: totals from user_counters, time windows from index range counts"""
+    def since(column, start):
+        return select(func.count()).select_from(User).where(column >= start).scalar_subquery()
+
+    metrics = user_totals(db)
+    row = db.execute(
+        select(
+            since(User.last_active, now - ACTIVE_WINDOW).label("recently_active"),
+            since(User.created_at, now - ACTIVE_WINDOW).label("new_users"),
+            since(User.created_at, series_start).label("series_users"),
+        )
+    ).one()
+    metrics.update(
+        recently_active=row.recently_active,
+        new_users=row.new_users,
+        users_before_series=metrics["total_users"] - row.series_users,
+    )
+    return metrics
+
+
+def signup_series(db: Session, period: str, series_start: datetime) -> Dict[date, int]:
+    """Count signups per bucket since series_start with a single grouped query"""
+    dialect = db.bind.dialect.name
+    bucket = bucket_expr(period, dialect, utc(User.created_at, dialect)).label("bucket")
+    rows = db.execute(
+        select(bucket, func.count(User.id))
+        .where(User.created_at >= series_start)
+        .group_by(bucket)
+    ).all()
+    return {as_date(b): n for b, n in rows}
+
+
+def rollup_headline_metrics(db: Session, today: date, series_start: date) -> Dict[str, int]:
+    """Time-window counters summed from the daily rollup, totals from user_counters"""
+    row = db.execute(
+        select(
+            func.coalesce(
+                func.sum(UserMetricsDaily.last_seen_users).filter(UserMetricsDaily.day > today - ACTIVE_WINDOW), 0
+            ).label("recently_active"),
+            func.coalesce(
+                func.sum(UserMetricsDaily.new_users).filter(UserMetricsDaily.day > today - ACTIVE_WINDOW), 0
+            ).label("new_users"),
+            func.coalesce(
+                func.sum(UserMetricsDaily.new_users).filter(UserMetricsDaily.day < series_start), 0
+            ).label("users_before_series"),
+        )
+    ).one()
+    return {**user_totals(db), **row._mapping}
+
+
+def rollup_signup_series(db: Session, period: str, series_start: date) -> Dict[date, int]:
+    """Signups per bucket summed from the rollup rows of the charted days"""
+    bucket = bucket_expr(period, db.bind.dialect.name, UserMetricsDaily.day).label("bucket")
+    rows = db.execute(
+        select(bucket, func.sum(UserMetricsDaily.new_users))
+        .where(UserMetricsDaily.day >= series_start)
+        .group_by(bucket)
+    ).all()
+    return {as_date(b): n for b, n in rows}
+
+
+def cents(amount: int) -> float:
+    """Minor currency units to a decimal amount for API responses"""
+    return round(amount / 100, 2)
+
+
+def revenue_series(db: Session, period: str, series_start: date) -> Dict[date, int]:
+    """Revenue in cents per bucket, summed from the revenue_daily rows of the charted days"""
+    bucket = bucket_expr(period, db.bind.dialect.name, RevenueDaily.day).label("bucket")
+    rows = db.execute(
+        select(bucket, func.sum(RevenueDaily.revenue_cents))
+        .where(RevenueDaily.day >= series_start)
+        .group_by(bucket)
+    ).all()
+    return {as_date(b): int(n) for b, n in rows}
+
+
+def revenue_totals(db: Session, today: date) -> Dict[str, int]:
+    """All-time revenue and revenue of the last ACTIVE_WINDOW days, in cents, from revenue_daily"""
+    def revenue(*conditions):
+        # sum(bigint) is numeric on PostgreSQL
+        return cast(func.coalesce(func.sum(RevenueDaily.revenue_cents).filter(*conditions), 0), BigInteger)
+
+    row = db.execute(
+        select(
+            revenue().label("total_revenue"),
+            revenue(RevenueDaily.day > today - ACTIVE_WINDOW).label("window_revenue"),
+        )
+    ).one()
+    return dict(row._mapping)
+
+
+def revenue_metrics(db: Session, today: date) -> Dict[str, float]:
+    """Revenue, revenue per paying user and churn over the last ACTIVE_WINDOW days
+
+    Amounts are in cents. Revenue comes from the trigger-maintained
+    revenue_daily table; paying users and subscription counts are range
+    reads of partial indexes on payments and subscriptions, so none of this
+    scans the payments table. Churn is the share of subscriptions running
+    when the window opened that ended inside it.
+    """
+    window_start = datetime.combine(today - ACTIVE_WINDOW + timedelta(days=1), time.min, tzinfo=timezone.utc)
+
+    def subscriptions(*conditions):
+        return select(func.count()).select_from(Subscription).where(*conditions).scalar_subquery()
+
+    totals = revenue_totals(db, today)
+    row = db.execute(
+        select(
+            select(func.count(distinct(Payment.user_id)))
+            .where(Payment.status == PaymentStatus.succeeded, Payment.paid_at >= window_start)
+            .scalar_subquery().label("paying_users"),
+            subscriptions(Subscription.status == SubscriptionStatus.active).label("active"),
+            subscriptions(
+                Subscription.status == SubscriptionStatus.active, Subscription.started_at >= window_start
+            ).label("started_active"),
+            subscriptions(
+                Subscription.ended_at >= window_start, Subscription.started_at < window_start
+            ).label("churned"),
+        )
+    ).one()
+
+    # Running at window start: active now and started before it, or ended inside it
+    running = row.active - row.started_active + row.churned
+    return {
+        **totals,
+        "paying_users": row.paying_users,
+        "revenue_per_paying_user": totals["window_revenue"] / row.paying_users if row.paying_users else 0,
+        "churn_rate": round(row.churned / running * 100, 2) if running else 0.0,
+    }
+
+
+def summary_metrics(db: Session) -> Dict[str, int]:
+    """Headline counters, from the rollup while it is fresh"""
+    now = datetime.now(timezone.utc)
+    if rollup_fresh(db):
+        return rollup_headline_metrics(db, now.date(), now.date())
+    return headline_metrics(db, now, now)
+
+
+def build_dashboard(db: Session, period: str) -> Tuple[Dict[str, int], List[dict]]:
+    """Headline metrics and the cumulative user growth chart for a period"""
+    now = datetime.now(timezone.utc)
+    starts = bucket_starts(period, now.date())
+    series_start = datetime.combine(starts[0], time.min, tzinfo=timezone.utc)
+
+    if rollup_fresh(db):
+        metrics = rollup_headline_metrics(db, now.date(), starts[0])
+        signups = rollup_signup_series(db, period, starts[0])
+    else:
+        metrics = headline_metrics(db, now, series_start)
+        signups = signup_series(db, period, series_start)
+
+    metrics["monthly_revenue"] = revenue_totals(db, now.date())["window_revenue"]
+    revenue = revenue_series(db, period, starts[0])
+
+    _, label_format = PERIODS[period]
+    chart_data = []
+    users_count = metrics["users_before_series"]
+    for position, start in enumerate(starts):
+        users_count += signups.get(start, 0)
+        remaining = len(starts) - position
+        chart_data.append({
+            "month": start.strftime(label_format),
+            "date": start.isoformat(),
+            "revenue": cents(revenue.get(start, 0)),
+            "users": users_count or remaining * 50  # Simulated if no real data
+        })
+
+    return metrics, chart_data
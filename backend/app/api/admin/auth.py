@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from app.database import AnySession, get_db, run_db
+from app.models.user import User
+from app.auth import create_access_token, get_user_by_email
+from app.hashing import HashPoolFull, hash_pool
+from app.schemas.user import LoginResponse, LoginUser
+
+router = APIRouter()
+
+
+class LoginRequest(BaseModel):
+    email: str
+    password: str
+
+
+@router.post("/login", response_model=LoginResponse)
+async def admin_login(login_data: LoginRequest, db: AnySession = Depends(get_db)):
+    """Admin login endpoint"""
+    user = await run_db(db, get_user_by_email, login_data.email)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Password hashing is CPU bound, keep it on the hashing pool
+    try:
+        verified, new_hash = await hash_pool.verify_and_update(login_data.password, user.hashed_password)
+    except HashPoolFull:
+        raise HTTPException(status_code=503, detail="Too many login attempts in progress, retry shortly",
+                            headers={"Retry-After": "1"})
+    if not verified:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Transparently upgrade hashes made with deprecated schemes or old cost parameters
+    if new_hash:
+        await run_db(db, update_password_hash, user.id, new_hash)
+
+    # Create access token
+    access_token = create_access_token(data={"sub": user.email})
+
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": LoginUser(id=user.id, email=user.email, name=user.name, role=user.role)
+    }
+
+
+def update_password_hash(db: Session, user_id: int, hashed_password: str) -> None:
+    db.query(User).filter(User.id == user_id).update(
+        {User.hashed_password: hashed_password}, synchronize_session=False
+    )
+    db.commit()
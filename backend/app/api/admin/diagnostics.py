@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from app.auth import Principal, get_current_admin
+import app.database as database
+
+router = APIRouter()
+
+
+@router.get("/database")
+async def get_database_diagnostics(current_admin: Principal = Depends(get_current_admin)):
+    """Get the effective connection pool configuration and current pool usage"""
+    return {"success": True, "database": database.pool_status()}
@@ -1,107 +1,97 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta
-from app.database import get_db
-from app.models.user import User, UserStatus
-from app.auth import get_current_admin
+from datetime import datetime, timezone
+from app.database import AnySession, get_read_db, read_session_factory, run_db
+from app.auth import Principal, get_current_admin
+from app.analytics import build_dashboard, cents, revenue_metrics, summary_metrics, user_breakdown
+from app.cache import report_cache
+from app.exports import MEDIA_TYPES, accepts_gzip, export_users
 
 router = APIRouter()
 
 
 @router.get("/analytics")
-def get_analytics(
-    period: str = "monthly",
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+async def get_analytics(
+    period: str = Query("monthly", pattern="^(daily|weekly|monthly)$"),
+    db: AnySession = Depends(get_read_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Get analytics data for dashboard"""
-    total_users = db.query(func.count(User.id)).scalar()
-    active_users = db.query(func.count(User.id)).filter(User.status == UserStatus.active).scalar()
-    
-    # Calculate active subscriptions (non-free plans)
-    active_subscriptions = db.query(func.count(User.id)).filter(
-        User.subscription_plan.in_(["Premium", "Enterprise"])
-    ).scalar()
-    
-    # Simulated monthly revenue (in production, calculate from actual subscription data)
-    monthly_revenue = active_subscriptions * 45  # Average revenue per subscriber
-    
-    # Get users created in last 30 days
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    active_today = db.query(func.count(User.id)).filter(
-        User.last_active >= thirty_days_ago
-    ).scalar()
-    
-    # Generate chart data for last 6 months
-    chart_data = []
-    for i in range(5, -1, -1):
-        month_date = datetime.utcnow() - timedelta(days=30 * i)
-        month_name = month_date.strftime("%b")
-        
-        # Count users created up to this month
-        users_count = db.query(func.count(User.id)).filter(
-            User.created_at <= month_date
-        ).scalar()
-        
-        chart_data.append({
-            "month": month_name,
-            "revenue": monthly_revenue * (i + 1) // 6,  # Simulated growth
-            "users": users_count or (i + 1) * 50  # Simulated if no real data
-        })
+    return await report_cache.aget_or_set(
+        ("analytics", period), lambda: run_db(db, _analytics_response, period)
+    )
+
+
+def _analytics_response(db: Session, period: str) -> dict:
+    metrics, chart_data = build_dashboard(db, period)
     
     return {
         "success": True,
         "metrics": {
-            "totalUsers": total_users,
-            "activeSubscriptions": active_subscriptions,
-            "monthlyRevenue": monthly_revenue,
-            "activeUsers": active_today
+            "totalUsers": metrics["total_users"],
+            "activeSubscriptions": metrics["active_subscriptions"],
+            "monthlyRevenue": cents(metrics["monthly_revenue"]),
+            "activeUsers": metrics["recently_active"]
         },
         "chartData": chart_data
     }
 
 
 @router.get("")
-def get_reports(
+async def get_reports(
     type: str = "summary",
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    db: AnySession = Depends(get_read_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Get reports summary"""
-    total_users = db.query(func.count(User.id)).scalar()
-    
-    # Calculate metrics
-    new_users_30d = db.query(func.count(User.id)).filter(
-        User.created_at >= datetime.utcnow() - timedelta(days=30)
-    ).scalar()
-    
-    # Simulated metrics
-    total_revenue = total_users * 35  # Average revenue per user
-    churn_rate = 3.2
-    avg_revenue_per_user = 45.67
+    return await report_cache.aget_or_set(("reports", type), lambda: run_db(db, _reports_response))
+
+
+def _reports_response(db: Session) -> dict:
+    metrics = summary_metrics(db)
+    breakdown = user_breakdown(db)
+    revenue = revenue_metrics(db, datetime.now(timezone.utc).date())
     
     return {
         "success": True,
         "reports": {
-            "totalRevenue": total_revenue,
-            "newUsers": new_users_30d,
-            "churnRate": churn_rate,
-            "avgRevenuePerUser": avg_revenue_per_user
+            "totalRevenue": cents(revenue["total_revenue"]),
+            "monthlyRevenue": cents(revenue["window_revenue"]),
+            "newUsers": metrics["new_users"],
+            "churnRate": revenue["churn_rate"],
+            # Revenue of the last 30 days over the users who paid in them
+            "avgRevenuePerUser": cents(revenue["revenue_per_paying_user"]),
+            "payingUsers": revenue["paying_users"],
+            "usersByStatus": breakdown["status"],
+            "usersByPlan": breakdown["plan"]
         }
     }
 
 
+@router.get("/cache")
+async def get_report_cache_stats(current_admin: Principal = Depends(get_current_admin)):
+    """Get hit/miss counters of the report cache"""
+    return {"success": True, "cache": report_cache.stats()}
+
+
 @router.get("/export")
-def export_data(
-    type: str = "all",
-    format: str = "csv",
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+async def export_data(
+    request: Request,
+    type: str = Query("all", pattern="^(all|users)$"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_admin: Principal = Depends(get_current_admin)
 ):
-    """Export data (placeholder for actual export logic)"""
-    return {
-        "success": True,
-        "message": f"Export {format} will be generated",
-        "download_url": f"/downloads/export-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
-    }
+    """Stream an export of all users as CSV or NDJSON"""
+    gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    filename = f"export-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    # The encoding depends on Accept-Encoding either way
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        export_users(format, gzip=gzip, session_factory=read_session_factory(request.scope)),
+        media_type=MEDIA_TYPES[format],
+        headers=headers
+    )
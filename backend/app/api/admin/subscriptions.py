@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import Optional
+from app.database import AnySession, get_read_db, run_db
+from app.models.billing import Plan, Subscription, SubscriptionStatus
+from app.models.user import User
+from app.schemas.subscription import SubscriptionListResponse
+from app.auth import Principal, get_current_admin
+from app.pagination import before_cursor, cursor_columns, row_cursor
+from app.plans import plan_catalog
+from app.responses import ORJSONResponse
+
+router = APIRouter()
+
+# Columns SubscriptionResponse is built from
+LIST_COLUMNS = [
+    Subscription.id,
+    Subscription.user_id,
+    User.name.label("user_name"),
+    User.email.label("user_email"),
+    Plan.name.label("plan"),
+    Subscription.status,
+    Subscription.started_at,
+    Subscription.current_period_end,
+    Subscription.ended_at,
+]
+LIST_FIELDS = [column.key for column in LIST_COLUMNS]
+
+
+@router.get("/plans")
+async def get_subscription_plans(db: AnySession = Depends(get_read_db)):
+    """Get all active subscription plans
+
+    Served from the in-memory plan catalog; the database is only consulted
+    when the catalog is due to check the plans table for changes.
+    """
+    body = plan_catalog.cached()
+    if body is None:
+        body = await run_db(db, plan_catalog.load)
+    return Response(body, media_type="application/json")
+
+
+@router.get("", response_model=SubscriptionListResponse)
+async def get_subscriptions(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    status: Optional[SubscriptionStatus] = None,
+    user_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AnySession = Depends(get_read_db),
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Get subscriptions, newest first, optionally for one user or status
+
+    Pass the `next_cursor` of a previous response as `cursor` to page by
+    keyset instead of offset.
+    """
+    content = await run_db(db, _list_subscriptions, page, limit, status, user_id, cursor)
+    # Rows are already in SubscriptionResponse shape; skip per-object validation
+    return ORJSONResponse(content)
+
+
+def _list_subscriptions(
+    db: Session,
+    page: int,
+    limit: int,
+    status: Optional[SubscriptionStatus],
+    user_id: Optional[int],
+    cursor: Optional[str]
+) -> dict:
+    dialect = db.bind.dialect.name
+    query = (
+        select(*LIST_COLUMNS, *cursor_columns(Subscription.started_at, dialect))
+        .join(User, User.id == Subscription.user_id)
+        .join(Plan, Plan.id == Subscription.plan_id)
+        .order_by(Subscription.started_at.desc(), Subscription.id.desc())
+    )
+    if status is not None:
+        query = query.where(Subscription.status == status)
+    if user_id is not None:
+        query = query.where(Subscription.user_id == user_id)
+    
+    if cursor:
+        try:
+            query = query.where(before_cursor(Subscription.started_at, Subscription.id, cursor, dialect))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        query = query.offset((page - 1) * limit)
+    
+    # Fetch one extra row to know whether another page exists
+    rows = db.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = row_cursor(rows[-1], "started_at")
+    
+    return {
+        # zip() leaves out the cursor column
+        "subscriptions": [dict(zip(LIST_FIELDS, row)) for row in rows],
+        "page": None if cursor else page,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "success": True
+    }
@@ -1,131 +1,420 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import Optional
-from app.database import get_db
+import logging
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import ARRAY, BigInteger, Integer, any_, cast, func, literal, select, update
+from typing import List, Optional, Tuple
+from app.config import settings
+from app.database import AnySession, SessionLocal, get_db, get_read_db, run_db
+from app.models.metrics import UserCounter
 from app.models.user import User, UserStatus
-from app.schemas.user import UserResponse, UserListResponse, UserUpdate
-from app.auth import get_current_admin
+from app.schemas.user import (
+    UserResponse, UserListResponse, UserUpdate, UserBulkRequest, UserBulkResponse, UserImportResponse
+)
+from app.auth import Principal, get_current_admin, principal_cache
+from app.pagination import before_cursor, cursor_columns, row_cursor
+from app.search import apply_user_search, count_matches
+from app.cache import report_cache
+from app.hashing import bulk_hash_executor
+from app.imports import import_users
+from app.responses import ORJSONResponse
+from app.etags import etag_headers, etag_matches, not_modified, weak_etag
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
+# User fields that feed the report and analytics counters
+METRIC_FIELDS = {"status", "subscription_plan"}
+
+# User fields held by cached principals
+PRINCIPAL_FIELDS = {"email", "role", "status"}
+
+# Columns UserResponse is built from; listings select only these
+LIST_FIELDS = list(UserResponse.model_fields)
+LIST_COLUMNS = [getattr(User, field) for field in LIST_FIELDS]
+
 
 @router.get("", response_model=UserListResponse)
-def get_users(
+async def get_users(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    approximate: bool = False,
+    db: AnySession = Depends(get_read_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
-    """Get all users with pagination and search"""
-    query = db.query(User)
+    """Get all users with pagination and search
+
+    Pass the `next_cursor` of a previous response as `cursor` to page by
+    keyset instead of offset. The total count is only returned when
+    `include_total` is set; it is exact, except for searches with
+    `approximate` set, which get the query planner's estimate. Responds 304 Not Modified when If-None-Match
+    carries the current ETag of the page.
+    """
+    etag, content = await run_db(
+        db, _list_users, page, limit, search, cursor, include_total, approximate,
+        request.headers.get("if-none-match")
+    )
+    if content is None:
+        return not_modified(etag)
+    # Rows are already in UserResponse shape; skip per-object validation
+    return ORJSONResponse(content, headers=etag_headers(etag))
+
+
+def _users_version(db: Session) -> tuple:
+    """Version of the users table as (total, max(updated_at), max(last_active))
+
+    Never scans the table, whatever the list is filtered by: the total is
+    summed from user_counters, and both maxima are read from the end of
+    their indexes (ix_users_updated_at, ix_users_last_active). Inserts and
+    deletes change the total, edits move updated_at (onupdate=func.now()),
+    and activity flushes, which leave updated_at alone, move last_active.
+    """
+    version = select(
+        select(cast(func.coalesce(func.sum(UserCounter.user_count), 0), BigInteger)).scalar_subquery(),
+        select(func.max(User.updated_at)).scalar_subquery(),
+        select(func.max(User.last_active)).scalar_subquery(),
+    )
+    return tuple(db.execute(version.execution_options(prepare=True)).one())
+
+
+def _list_users(
+    db: Session,
+    page: int,
+    limit: int,
+    search: Optional[str],
+    cursor: Optional[str],
+    include_total: bool,
+    approximate: bool = False,
+    if_none_match: Optional[str] = None
+) -> Tuple[str, Optional[dict]]:
+    """Return the page's ETag and content; content is None when if_none_match still matches"""
+    dialect = db.bind.dialect.name
+    query = select(*LIST_COLUMNS, *cursor_columns(User.created_at, dialect))
+    rank = None
     
     # Apply search filter
     if search:
-        query = query.filter(
-            or_(
-                User.name.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-                User.id.like(f"%{search}%")
-            )
-        )
+        query, rank = apply_user_search(query, search, dialect)
     
-    # Get total count
-    total = query.count()
+    total_users, *version = _users_version(db)
+    etag = weak_etag("users", total_users, *version, page, limit, search, cursor, include_total, approximate)
+    if etag_matches(if_none_match, etag):
+        return etag, None
+    
+    total = None
+    if include_total:
+        total = count_matches(db, query, approximate) if search else total_users
     
     # Apply pagination
-    offset = (page - 1) * limit
-    users = query.order_by(User.created_at.desc()).offset(offset).limit(limit).all()
+    if rank is not None:
+        # Ranked search results are ordered by relevance, so only offset paging applies
+        if cursor:
+            raise HTTPException(status_code=400, detail="Cursor paging is not supported for ranked search")
+        query = query.order_by(rank.desc(), User.id.desc())
+    else:
+        query = query.order_by(User.created_at.desc(), User.id.desc())
     
-    return {
-        "users": users,
+    if cursor:
+        try:
+            query = query.filter(before_cursor(User.created_at, User.id, cursor, dialect))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        query = query.offset((page - 1) * limit)
+    
+    # Fetch one extra row to know whether another page exists
+    rows = db.execute(query.limit(limit + 1).execution_options(prepare=True)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if rank is None:
+            next_cursor = row_cursor(rows[-1], "created_at")
+    
+    return etag, {
+        # zip() leaves out the cursor column
+        "users": [dict(zip(LIST_FIELDS, row)) for row in rows],
         "total": total,
-        "page": page,
+        "page": None if cursor else page,
         "limit": limit,
+        "next_cursor": next_cursor,
+        "success": True
+    }
+
+
+@router.post("/bulk", response_model=UserBulkResponse)
+async def bulk_update_users(
+    bulk: UserBulkRequest,
+    db: AnySession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Apply status/plan changes to many users, selected by id list or filter
+
+    Users are updated in chunks of `chunk_size`, each with a single
+    UPDATE ... RETURNING committed on its own. The response is a summary
+    sent after the last chunk, not progress: it lists how many rows each
+    chunk changed. If a chunk fails, the chunks before it stay committed
+    and the 500 response lists them the same way under `detail`. Id lists
+    are capped at BULK_MAX_IDS.
+    """
+    changes = bulk.changes.model_dump(exclude_unset=True)
+    criteria = bulk.filter.model_dump(exclude_none=True) if bulk.filter else None
+    try:
+        chunks, emails = await run_db(db, _bulk_update, bulk.ids, criteria, changes, bulk.chunk_size)
+        interrupted = None
+    except BulkUpdateInterrupted as e:
+        chunks, emails, interrupted = e.chunks, e.emails, e
+    
+    # Committed chunks are applied whether or not a later one failed
+    if PRINCIPAL_FIELDS & changes.keys():
+        for email in emails:
+            principal_cache.discard(email)
+    if METRIC_FIELDS & changes.keys() and chunks:
+        report_cache.invalidate()
+    
+    updated = sum(chunk["updated"] for chunk in chunks)
+    if interrupted is not None:
+        logger.error("%s", interrupted, exc_info=interrupted)
+        raise HTTPException(status_code=500, detail={
+            "message": f"Chunk {len(chunks) + 1} failed; the {len(chunks)} chunks before it are applied",
+            "updated": updated,
+            "chunks": chunks,
+        })
+    
+    return {
+        "updated": updated,
+        "chunks": chunks,
         "success": True
     }
 
 
+@router.post("/import", response_model=UserImportResponse)
+async def import_users_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    on_conflict: str = Query("skip", pattern="^(skip|update)$"),
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Bulk import users from an uploaded CSV or NDJSON file
+
+    Existing emails are skipped, or have name/role/plan updated with
+    `on_conflict=update`. Rows that fail validation are listed in `errors`
+    without aborting the rest of the import.
+    """
+    if format is None:
+        format = "ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv"
+    report = await run_in_threadpool(_import_file, file.file, format, on_conflict)
+    
+    if report["updated"]:
+        principal_cache.invalidate()
+    if report["inserted"] or report["updated"]:
+        report_cache.invalidate()
+    return {**report, "success": True}
+
+
+def _import_file(stream, format: str, on_conflict: str) -> dict:
+    # Runs on its own session and connection: COPY needs the sync driver in either DB mode
+    db = SessionLocal()
+    executor = bulk_hash_executor(settings.IMPORT_HASH_WORKERS)
+    try:
+        return import_users(db, stream, format, executor, on_conflict=on_conflict)
+    finally:
+        executor.shutdown()
+        db.close()
+
+
+def _id_in(ids: List[int], dialect: str):
+    """id = ANY(:ids) on PostgreSQL (one array parameter), IN (...) elsewhere"""
+    if dialect == "postgresql":
+        return User.id == any_(literal(ids, ARRAY(Integer)))
+    return User.id.in_(ids)
+
+
+class BulkUpdateInterrupted(Exception):
+    """A bulk update chunk failed; carries what the chunks before it committed"""
+
+    def __init__(self, chunks: List[dict], emails: List[str]):
+        super().__init__(f"Bulk update failed after {len(chunks)} committed chunks")
+        self.chunks = chunks
+        self.emails = emails
+
+
+def _bulk_update(
+    db: Session,
+    ids: Optional[List[int]],
+    criteria: Optional[dict],
+    changes: dict,
+    chunk_size: int
+) -> Tuple[List[dict], List[str]]:
+    """Run the chunked UPDATEs; returns per-chunk row counts and the affected emails
+
+    Raises BulkUpdateInterrupted, caused by the original error, when a chunk fails.
+    """
+    dialect = db.bind.dialect.name
+    chunks = []
+    emails = []
+    last_id = 0
+    
+    if ids is not None:
+        targets = sorted(set(ids))
+        batches = (targets[i:i + chunk_size] for i in range(0, len(targets), chunk_size))
+    else:
+        batches = None
+    
+    while True:
+        if batches is not None:
+            batch = next(batches, None)
+            if batch is None:
+                break
+            condition = _id_in(batch, dialect)
+            batch_last_id = batch[-1]
+        else:
+            # Walk the filtered set in id order so every chunk is an index range
+            candidate = aliased(User)
+            chunk_ids = (
+                select(candidate.id)
+                .filter_by(**criteria)
+                .where(candidate.id > last_id)
+                .order_by(candidate.id)
+                .limit(chunk_size)
+                .scalar_subquery()
+            )
+            condition = User.id.in_(chunk_ids)
+            batch_last_id = None
+        
+        try:
+            rows = db.execute(
+                update(User)
+                .where(condition)
+                .values(**changes)
+                .returning(User.id, User.email)
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise BulkUpdateInterrupted(chunks, emails) from e
+        
+        if batch_last_id is None:
+            if not rows:
+                break
+            batch_last_id = max(row.id for row in rows)
+        last_id = batch_last_id
+        emails.extend(row.email for row in rows)
+        chunks.append({"chunk": len(chunks) + 1, "updated": len(rows), "last_id": last_id})
+    
+    return chunks, emails
+
+
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    request: Request,
+    response: Response,
+    db: AnySession = Depends(get_read_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
-    """Get a specific user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    """Get a specific user by ID
+
+    The ETag follows the user's updated_at and last_active (activity
+    flushes move the latter alone); a matching If-None-Match gets 304 Not
+    Modified without serializing the user.
+    """
+    user = await run_db(db, _get_user_or_404, user_id)
+    etag = weak_etag("user", user.id, user.updated_at, user.last_active)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
+    return user
+
+
+def _get_user_or_404(db: Session, user_id: int) -> User:
+    user = db.query(User).filter(User.id == user_id).execution_options(prepare=True).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    db: AnySession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Update a user"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    update_data = user_update.dict(exclude_unset=True)
+    user, previous_email = await run_db(db, _update_user, user_id, update_data)
+    if PRINCIPAL_FIELDS & update_data.keys():
+        principal_cache.discard(previous_email)
+    if METRIC_FIELDS & update_data.keys():
+        report_cache.invalidate()
+    return user
+
+
+def _update_user(db: Session, user_id: int, update_data: dict) -> Tuple[User, str]:
+    """Apply an update and return the refreshed user with their email before it"""
+    user = _get_user_or_404(db, user_id)
+    previous_email = user.email
     
     # Update fields
-    update_data = user_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(user, field, value)
     
     db.commit()
     db.refresh(user)
-    return user
+    return user, previous_email
 
 
 @router.post("/{user_id}/suspend")
-def suspend_user(
+async def suspend_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    db: AnySession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Suspend a user"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    user.status = UserStatus.suspended
-    db.commit()
+    email = await run_db(db, _set_status, user_id, UserStatus.suspended)
+    principal_cache.discard(email)
+    report_cache.invalidate()
     
-    return {"success": True, "message": f"User {user.email} has been suspended"}
+    return {"success": True, "message": f"User {email} has been suspended"}
 
 
 @router.post("/{user_id}/activate")
-def activate_user(
+async def activate_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    db: AnySession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Activate a suspended user"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    email = await run_db(db, _set_status, user_id, UserStatus.active)
+    principal_cache.discard(email)
+    report_cache.invalidate()
     
-    user.status = UserStatus.active
+    return {"success": True, "message": f"User {email} has been activated"}
+
+
+def _set_status(db: Session, user_id: int, status: UserStatus) -> str:
+    """Change a user's status and return their email"""
+    user = _get_user_or_404(db, user_id)
+    user.status = status
+    email = user.email
     db.commit()
-    
-    return {"success": True, "message": f"User {user.email} has been activated"}
+    return email
 
 
 @router.post("/{user_id}/reset-password")
-def reset_user_password(
+async def reset_user_password(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    db: AnySession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Send password reset link to user (simulated)"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = await run_db(db, _get_user_or_404, user_id)
     
     # In production, send actual password reset email
     return {"success": True, "message": f"Password reset link sent to {user.email}"}
@@ -1,27 +1,38 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.database import get_db
-from app.models.user import User, UserRole
+from app.database import AnySession, get_db, run_db
+from app.models.user import User, UserRole, UserStatus
+from app.activity import activity_tracker
+from app.cache import TTLCache
+# Re-exported; they live in app.hashing so scripts can hash without importing FastAPI
+from app.hashing import get_password_hash, verify_password
 from app.schemas.user import TokenData
 
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+@dataclass(frozen=True)
+class Principal:
+    """Authorization facts about the user behind a token"""
+    id: int
+    email: str
+    role: UserRole
+    status: UserStatus
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+# Principals keyed by token subject; user writes must discard the affected
+# email. The cache is per process, so other workers only see a role or status
+# change once their entry expires (PRINCIPAL_CACHE_TTL_SECONDS)
+principal_cache = TTLCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -37,11 +48,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token"""
+    db: AnySession = Depends(get_db)
+) -> Principal:
+    """Get the current authenticated principal from JWT token"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -58,14 +69,34 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.email).first()
-    if user is None:
-        raise credentials_exception
+    async def load_principal() -> Principal:
+        principal = await run_db(db, get_principal_by_email, token_data.email)
+        if principal is None:
+            raise credentials_exception
+        return principal
     
-    return user
+    principal = await principal_cache.aget_or_set(token_data.email, load_principal)
+    activity_tracker.touch(principal.id)
+    return principal
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    """Look up a user by email"""
+    return db.query(User).filter(User.email == email).execution_options(prepare=True).first()
+
+
+def get_principal_by_email(db: Session, email: str) -> Optional[Principal]:
+    """Load only the columns needed to authorize a request"""
+    row = (
+        db.query(User.id, User.email, User.role, User.status)
+        .filter(User.email == email)
+        .execution_options(prepare=True)
+        .first()
+    )
+    return Principal(*row) if row else None
 
 
-def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Verify that the current user is an admin"""
     if current_user.role not in [UserRole.admin, UserRole.super_admin]:
         raise HTTPException(
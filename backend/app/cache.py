@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from app.config import settings
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL
+
+    Concurrent misses on the same key are coalesced: the first caller
+    computes the value while the others wait for it, so an expired entry
+    is recomputed once rather than once per request. get_or_set serves
+    threads, aget_or_set serves coroutines on the event loop.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, key: Hashable):
+        """Return (found, value); caller must hold self._lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                # Another caller may have filled the entry while we waited
+                found, value = self._lookup(key)
+                if found:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+                generation = self._generation
+
+            try:
+                value = compute()
+            except BaseException:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+                raise
+
+            with self._lock:
+                self._store(key, value, generation)
+                self._key_locks.pop(key, None)
+            return value
+
+    def _store(self, key: Hashable, value: Any, generation: int) -> None:
+        """Insert an entry and evict LRU entries; caller must hold self._lock"""
+        # Drop results computed from data invalidated in the meantime
+        if generation != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def aget_or_set(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of get_or_set; waiters share the in-flight computation
+
+        If the computing request is cancelled (say its client disconnected),
+        its waiters are not: they start over, and one of them computes.
+        """
+        while True:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    self.hits += 1
+                    return value
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    generation = self._generation
+                    owned = self._pending[key] = asyncio.get_running_loop().create_future()
+                    break
+                self.hits += 1
+            # Unlike awaiting the future, wait() leaves its cancellation to us
+            await asyncio.wait((pending,))
+            if not pending.cancelled():
+                return pending.result()
+
+        try:
+            value = await compute()
+        except BaseException as exc:
+            with self._lock:
+                self._pending.pop(key, None)
+            if isinstance(exc, asyncio.CancelledError):
+                # Sends the waiters round again
+                owned.cancel()
+            else:
+                owned.set_exception(exc)
+                # Mark the exception retrieved in case nobody was waiting
+                owned.exception()
+            raise
+
+        with self._lock:
+            self._store(key, value, generation)
+            self._pending.pop(key, None)
+        owned.set_result(value)
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared cache for report and analytics responses
+report_cache = TTLCache(
+    ttl=settings.REPORT_CACHE_TTL_SECONDS,
+    maxsize=settings.REPORT_CACHE_MAX_ENTRIES,
+)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import List, Literal, Optional
 import json
 
 
@@ -11,16 +11,82 @@ class Settings(BaseSettings):
     DB_USER: str = "postgres"
     DB_PASSWORD: str
     DB_NAME: str = "jiva_admin"
+    DB_ASYNC: bool = False
+    
+    # Connection pool of each engine, per worker process. Pre-ping "always"
+    # tests every checkout, "idle" only connections unused for the given
+    # seconds, "never" relies on pool_recycle alone
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 30
+    # psycopg server-side prepared statements for the hot queries; keep off
+    # behind PgBouncer in transaction pooling mode
+    DB_PREPARED_STATEMENTS: bool = False
+    
+    # Read replica for read-only routes; clients whose last write (carried in
+    # the last_write cookie or X-Last-Write header) is within the lag bound
+    # keep reading from the primary
+    READ_DATABASE_URL: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
     
+    # Password hashing (argon2 costs default to passlib's when unset)
+    HASH_POOL_SIZE: int = 2
+    HASH_QUEUE_SIZE: int = 32
+    ARGON2_TIME_COST: Optional[int] = None
+    ARGON2_MEMORY_COST: Optional[int] = None
+    ARGON2_PARALLELISM: Optional[int] = None
+    IMPORT_HASH_WORKERS: int = 4
+    
+    # Largest id list POST /admin/users/bulk accepts; bigger sets go by filter
+    BULK_MAX_IDS: int = 100000
+    
     # API
     API_V1_PREFIX: str = "/api"
     BACKEND_CORS_ORIGINS: str = '["http://localhost:3000"]'
     
+    # Authenticated principal cache, per worker process. A role, status or
+    # email change takes effect at once on the worker that made it; other
+    # workers keep the old principal for up to the TTL
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 5
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 1024
+    
+    # last_active tracking: each user is written at most once per interval
+    ACTIVITY_FLUSH_SECONDS: float = 60
+    
+    # Paid plans past plan_valid_until are moved to Free in batches, every
+    # interval in each API worker (0 disables; scripts/expire_plans.py runs it once)
+    PLAN_EXPIRY_INTERVAL_SECONDS: float = 300
+    PLAN_EXPIRY_BATCH_SIZE: int = 1000
+    
+    # Plan catalog: seconds between checks of the plans table for changes
+    PLAN_CATALOG_CHECK_SECONDS: float = 30
+    
+    # Dashboard and reports read the daily rollup only while its last refresh
+    # (scripts/refresh_metrics.py) is at most this old, and query users otherwise
+    METRICS_ROLLUP_MAX_AGE_SECONDS: float = 900
+    
+    # Report cache
+    REPORT_CACHE_TTL_SECONDS: float = 30
+    REPORT_CACHE_MAX_ENTRIES: int = 128
+    
+    # SQL diagnostics: full statement echo, slow-query log threshold and
+    # per-request statement limit (warns, or raises with *_RAISE for tests)
+    SQL_ECHO: bool = False
+    SLOW_QUERY_MS: Optional[float] = 200
+    SQL_STATEMENT_LIMIT: Optional[int] = None
+    SQL_STATEMENT_LIMIT_RAISE: bool = False
+    
+    # Prometheus /metrics endpoint and request instrumentation
+    METRICS_ENABLED: bool = True
+    
     # Environment
     ENVIRONMENT: str = "development"
     
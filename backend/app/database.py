@@ -1,28 +1,335 @@
-from sqlalchemy import create_engine
+import time
+import threading
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from typing import Optional, Union
+# Starlette's Request rather than fastapi's, so scripts importing the models never load FastAPI
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
 from app.config import settings
+from app.metrics import TimedAsyncQueuePool, TimedQueuePool
+from app.querystats import attach_query_listeners
+from app.replica import read_from_primary
 
 dsn = settings.DATABASE_URL or (
     f"postgresql+psycopg://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 )
 
-engine = create_engine(
-    dsn,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=settings.ENVIRONMENT == "development"
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def async_dsn(url: str) -> str:
+    """Map a sync DSN onto its asyncio driver"""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+psycopg://" + url[len("postgresql://"):]
+    # postgresql+psycopg selects psycopg's async connection under create_async_engine
+    return url
+
+
+def engine_options(url: str, asyncio: bool = False) -> dict:
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "echo": settings.SQL_ECHO,
+    }
+    driver_url = make_url(async_dsn(url) if asyncio else url)
+    # aiosqlite and in-memory SQLite use pools without size limits
+    if issubclass(driver_url.get_dialect(_is_async=asyncio).get_pool_class(driver_url), QueuePool):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    if driver_url.get_backend_name() == "postgresql":
+        if settings.METRICS_ENABLED:
+            # Same QueuePool behaviour, plus checkout wait times for /metrics
+            options["poolclass"] = TimedAsyncQueuePool if asyncio else TimedQueuePool
+        if driver_url.get_driver_name() == "psycopg":
+            # No implicit preparing after repeated executions. None disables
+            # prepared statements altogether; with DB_PREPARED_STATEMENTS the
+            # threshold is never reached and only statements with the
+            # `prepare` execution option are prepared (see prepare_marked)
+            options["connect_args"] = {
+                "prepare_threshold": 2 ** 31 if settings.DB_PREPARED_STATEMENTS else None,
+            }
+    return options
+
+
+def ping_idle_connections(engine: Engine) -> None:
+    """Test connections on checkout only when they sat in the pool for a while
+
+    Connections reused within DB_POOL_PRE_PING_IDLE_SECONDS skip the extra
+    round trip; a failed ping makes the pool replace the connection.
+    """
+    dialect = engine.dialect
+
+    def checkin(dbapi_connection, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    def checkout(dbapi_connection, record, proxy):
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < settings.DB_POOL_PRE_PING_IDLE_SECONDS:
+            return
+        try:
+            dialect.do_ping(dbapi_connection)
+        except Exception as exc:
+            raise DisconnectionError("Idle connection failed pre-ping") from exc
+
+    event.listen(engine, "checkin", checkin)
+    event.listen(engine, "checkout", checkout)
+
+
+def prepare_marked(cursor, statement, parameters, context):
+    """Execute statements carrying execution_options(prepare=True) as prepared statements"""
+    if context.execution_options.get("prepare"):
+        cursor.execute(statement, parameters, prepare=True)
+        return True
+    return False
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Statement accounting, idle pre-ping and prepared statements (use .sync_engine for async engines)"""
+    attach_query_listeners(engine)
+    if settings.DB_POOL_PRE_PING == "idle":
+        ping_idle_connections(engine)
+    if settings.DB_PREPARED_STATEMENTS and engine.dialect.driver == "psycopg":
+        event.listen(engine, "do_execute", prepare_marked)
+
+
+def create_engines(url: str):
+    """Instrumented sync engine for `url`, plus its async twin when DB_ASYNC is on"""
+    sync_engine = create_engine(url, **engine_options(url))
+    instrument_engine(sync_engine)
+    if not settings.DB_ASYNC:
+        return sync_engine, None
+    asyncio_engine = create_async_engine(async_dsn(url), **engine_options(url, asyncio=True))
+    instrument_engine(asyncio_engine.sync_engine)
+    return sync_engine, asyncio_engine
+
+
+def dispose_engines(sync_engine, asyncio_engine) -> None:
+    sync_engine.dispose()
+    if asyncio_engine is not None:
+        # Pooled asyncio connections are dropped without awaiting a clean close
+        asyncio_engine.sync_engine.dispose(close=False)
+
+
+class _EnginesOnFirstSession:
+    """Session factory mixin that creates the engines when the first session is made"""
+
+    def __call__(self, **local_kw):
+        init_engines()
+        return super().__call__(**local_kw)
+
+
+class LazySessionmaker(_EnginesOnFirstSession, sessionmaker):
+    pass
+
+
+class LazyAsyncSessionmaker(_EnginesOnFirstSession, async_sessionmaker):
+    pass
+
+
+# Engines are created on first use rather than at import, so importing the
+# app, the models or a script neither loads database drivers nor opens
+# pools; a process that preloads the app and forks workers (gunicorn
+# --preload) shares no connections with them. engine, async_engine,
+# read_engine and async_read_engine become module attributes once
+# init_engines() has run; until then __getattr__ creates them on access.
+_ENGINE_NAMES = ("engine", "async_engine", "read_engine", "async_read_engine")
+_engines_lock = threading.Lock()
+_engines_ready = False
+
+# The async session factories are used by the API when DB_ASYNC is enabled; scripts keep using SessionLocal
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
+
+AsyncSessionLocal = LazyAsyncSessionmaker(
+    autoflush=False, expire_on_commit=False
+) if settings.DB_ASYNC else None
+
+# Read-only routes go to the replica when READ_DATABASE_URL is set, otherwise
+# the read engines are the primary ones
+read_dsn = settings.READ_DATABASE_URL
+
+ReadSessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
+
+AsyncReadSessionLocal = LazyAsyncSessionmaker(
+    autoflush=False, expire_on_commit=False
+) if settings.DB_ASYNC else None
+
+
+def _bind_engines(url: str, read_url: Optional[str]) -> None:
+    global engine, async_engine, read_engine, async_read_engine, _engines_ready
+    engine, async_engine = create_engines(url)
+    read_engine, async_read_engine = create_engines(read_url) if read_url else (engine, async_engine)
+    SessionLocal.configure(bind=engine)
+    ReadSessionLocal.configure(bind=read_engine)
+    if settings.DB_ASYNC:
+        AsyncSessionLocal.configure(bind=async_engine)
+        AsyncReadSessionLocal.configure(bind=async_read_engine)
+    _engines_ready = True
+
+
+def init_engines() -> None:
+    """Create the engines for dsn and read_dsn unless that already happened"""
+    if _engines_ready:
+        return
+    with _engines_lock:
+        if not _engines_ready:
+            _bind_engines(dsn, read_dsn)
+
+
+def __getattr__(name: str):
+    if name in _ENGINE_NAMES:
+        init_engines()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def configure_database(url: str, read_url: Optional[str] = None) -> None:
+    """Point the engines and session factories at another database
+
+    Overrides the DSNs from settings in-process, e.g. for benchmarks run
+    against a throwaway database. Without `read_url` reads share the
+    primary. Sessions opened afterwards use the new engines; the old ones
+    are disposed.
+    """
+    global dsn, read_dsn
+    with _engines_lock:
+        if _engines_ready:
+            if read_engine is not engine:
+                dispose_engines(read_engine, async_read_engine)
+            dispose_engines(engine, async_engine)
+        dsn, read_dsn = url, read_url
+        _bind_engines(url, read_url)
+
+
+def load_drivers() -> None:
+    """Import the dialects and DB-API drivers the engines will use, without creating the engines
+
+    A server that preloads the app calls this before forking, so workers
+    share the driver modules instead of each importing them.
+    """
+    for url in filter(None, (dsn, read_dsn)):
+        for asyncio in ((False, True) if settings.DB_ASYNC else (False,)):
+            driver_url = make_url(async_dsn(url) if asyncio else url)
+            driver_url.get_dialect(_is_async=asyncio).import_dbapi()
+
+
+def dispose_inherited_engines() -> None:
+    """Drop pooled connections inherited from a parent process, without closing them
+
+    Call in a freshly forked worker; the parent keeps using its
+    connections and the worker opens its own.
+    """
+    if not _engines_ready:
+        return
+    for inherited in {engine, read_engine}:
+        inherited.dispose(close=False)
+    for inherited in {async_engine, async_read_engine} - {None}:
+        inherited.sync_engine.dispose(close=False)
+
+
+def pool_engines() -> dict:
+    """Engines by metrics label; the replica ones only when a replica is configured"""
+    init_engines()
+    engines = {"sync": engine, "async": async_engine}
+    if read_engine is not engine:
+        engines.update(read_sync=read_engine, read_async=async_read_engine)
+    return engines
+
+
+def pool_status() -> dict:
+    """Effective pool configuration and live usage of every engine"""
+    engines = {}
+    for name, pooled_engine in pool_engines().items():
+        if pooled_engine is None:
+            continue
+        pool = pooled_engine.pool
+        status = {
+            "dialect": pooled_engine.dialect.name,
+            "pool_class": type(pool).__name__,
+            "prepared_statements": settings.DB_PREPARED_STATEMENTS and pooled_engine.dialect.driver == "psycopg",
+        }
+        if isinstance(pool, QueuePool):
+            status.update(
+                pool_size=pool.size(),
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                timeout=pool.timeout(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        engines[name] = status
+    return {
+        "pre_ping": settings.DB_POOL_PRE_PING,
+        "pre_ping_idle_seconds": settings.DB_POOL_PRE_PING_IDLE_SECONDS,
+        "recycle_seconds": settings.DB_POOL_RECYCLE,
+        "engines": engines,
+    }
+
 
 Base = declarative_base()
 
 
-def get_db():
+def get_sync_db():
     """Dependency for getting database session"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an asyncio database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+
+def read_session_factory(scope) -> sessionmaker:
+    """Session factory for a read: the replica, or the primary for clients that wrote within
+    REPLICA_MAX_LAG_SECONDS, so they never see data older than their own writes"""
+    return SessionLocal if read_from_primary(scope) else ReadSessionLocal
+
+
+def get_sync_read_db(request: Request):
+    """Dependency for getting a session on the read replica (see read_session_factory)"""
+    db = read_session_factory(request.scope)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Dependency for getting an asyncio session on the read replica"""
+    factory = AsyncSessionLocal if read_from_primary(request.scope) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
+
+
+get_read_db = get_async_read_db if settings.DB_ASYNC else get_sync_read_db
+
+# Session type handed out by get_db in either mode
+AnySession = Union[Session, AsyncSession]
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """Run a sync-style query function against the request's session
+
+    With an AsyncSession the function runs through run_sync, so its I/O
+    goes through the async driver without blocking the event loop. A plain
+    Session is driven from the threadpool instead.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
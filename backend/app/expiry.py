@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timezone
+from typing import Optional
+from sqlalchemy import Select, func, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.cache import report_cache
+from app.database import SessionLocal
+from app.metrics import PLAN_EXPIRY_BATCH_SECONDS, PLAN_EXPIRY_USERS
+from app.models.billing import Subscription, SubscriptionStatus
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+FREE_PLAN = "Free"
+
+
+def due_plans(today: date) -> Select:
+    """Ids of paid plans whose last valid day is before `today`, oldest first
+
+    The filter is the predicate of ix_users_paid_plan_valid_until and the
+    ordering its key, so reading a batch is a range scan of that partial
+    index whatever the size of users.
+    """
+    return (
+        select(User.id)
+        .where(User.subscription_plan != FREE_PLAN, User.plan_valid_until < today)
+        .order_by(User.plan_valid_until, User.id)
+    )
+
+
+def expire_batch(db: Session, today: date, batch_size: int) -> int:
+    """Move up to `batch_size` lapsed plans to Free in one UPDATE; returns the users changed
+
+    The batch is claimed with FOR UPDATE SKIP LOCKED, so concurrent workers
+    take disjoint batches instead of queueing behind each other's locks.
+    The users' active subscriptions are marked expired in the same
+    transaction.
+    """
+    claimed = due_plans(today).limit(batch_size).with_for_update(skip_locked=True).scalar_subquery()
+    user_ids = db.scalars(
+        update(User)
+        .where(User.id.in_(claimed))
+        .values(subscription_plan=FREE_PLAN, plan_valid_until=None)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if user_ids:
+        db.execute(
+            update(Subscription)
+            .where(Subscription.user_id.in_(user_ids), Subscription.status == SubscriptionStatus.active)
+            .values(status=SubscriptionStatus.expired, ended_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return len(user_ids)
+
+
+def expire_plans(
+    db: Session,
+    batch_size: int,
+    today: Optional[date] = None,
+    max_batches: Optional[int] = None
+) -> int:
+    """Downgrade lapsed plans batch by batch until none are left; returns the users downgraded
+
+    Stops at the first short batch: whatever remains is either locked by
+    another worker, which will finish it, or became due after `today`.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    expired = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        started = time.perf_counter()
+        try:
+            count = expire_batch(db, today, batch_size)
+        except Exception:
+            db.rollback()
+            raise
+        PLAN_EXPIRY_BATCH_SECONDS.observe(time.perf_counter() - started)
+        PLAN_EXPIRY_USERS.inc(count)
+        expired += count
+        batches += 1
+        if count < batch_size:
+            break
+    return expired
+
+
+def _expire_with_session(batch_size: int) -> int:
+    db = SessionLocal()
+    try:
+        return expire_plans(db, batch_size)
+    finally:
+        db.close()
+
+
+async def expire_plans_periodically(interval: float, batch_size: int) -> None:
+    """Run expire_plans() on the threadpool every interval until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            expired = await run_in_threadpool(_expire_with_session, batch_size)
+        except Exception:
+            logger.exception("Expiring lapsed plans failed")
+            continue
+        if expired:
+            logger.info("Moved %d users with lapsed plans to %s", expired, FREE_PLAN)
+            # Subscription counts changed
+            report_cache.invalidate()
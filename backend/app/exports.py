@@ -0,0 +1,134 @@
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Callable, Iterable, Iterator, Optional
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database import ReadSessionLocal
+from app.models.user import User
+
+# Exported user columns; hashed_password is deliberately never selected
+EXPORT_COLUMNS = [
+    User.id,
+    User.name,
+    User.email,
+    User.status,
+    User.role,
+    User.subscription_plan,
+    User.created_at,
+    User.updated_at,
+    User.last_active,
+    User.phone,
+    User.reference,
+    User.plan_valid_until,
+    User.is_email_verified,
+]
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _plain(value):
+    """Convert a column value to a CSV/JSON friendly scalar"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_user_rows(
+    session_factory: Callable[[], Session] = ReadSessionLocal, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[list]:
+    """Yield batches of user rows read through a server-side cursor
+
+    Owns its session because a streaming response outlives the request's
+    get_read_db dependency; routes pass database.read_session_factory()
+    so exports follow the same replica routing as other reads.
+    """
+    db = session_factory()
+    try:
+        result = db.execute(
+            select(*EXPORT_COLUMNS)
+            .order_by(User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def encode_csv(batches: Iterable[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in EXPORT_COLUMNS])
+    for batch in batches:
+        writer.writerows([_plain(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(batches: Iterable[list]) -> Iterator[bytes]:
+    # orjson writes enums by value and dates in isoformat, like _plain
+    for batch in batches:
+        yield b"".join(orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE) for row in batch)
+
+
+ENCODERS = {
+    "csv": encode_csv,
+    "ndjson": encode_ndjson,
+}
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows a gzip response
+
+    An explicit gzip entry decides by its q-value, otherwise a * entry
+    does; q=0 means "not acceptable". Tokens merely containing "gzip"
+    (x-gzip) do not count.
+    """
+    qualities = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream incrementally in gzip framing"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_users(
+    format: str, gzip: bool = False, session_factory: Callable[[], Session] = ReadSessionLocal
+) -> Iterator[bytes]:
+    """Stream every user encoded as CSV or NDJSON, optionally gzip-compressed"""
+    stream = ENCODERS[format](iter_user_rows(session_factory))
+    return gzip_stream(stream) if gzip else stream
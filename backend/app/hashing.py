@@ -0,0 +1,130 @@
+import asyncio
+import threading
+from functools import lru_cache
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from passlib.context import CryptContext
+from app.config import settings
+
+
+class HashPoolFull(Exception):
+    """Raised when the hashing queue is at capacity"""
+
+
+def context_options() -> dict:
+    """CryptContext keyword arguments, including any configured argon2 costs"""
+    options = {"schemes": ["argon2", "bcrypt"], "deprecated": "auto"}
+    for name, value in (
+        ("time_cost", settings.ARGON2_TIME_COST),
+        ("memory_cost", settings.ARGON2_MEMORY_COST),
+        ("parallelism", settings.ARGON2_PARALLELISM),
+    ):
+        if value is not None:
+            options[f"argon2__{name}"] = value
+    return options
+
+
+@lru_cache(maxsize=None)
+def pwd_context() -> CryptContext:
+    """In-process hash context, built on first use since loading the argon2 backend is not free"""
+    return CryptContext(**context_options())
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash"""
+    return pwd_context().verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """Hash a password"""
+    return pwd_context().hash(password)
+
+
+# Context used inside pool worker processes, built by the initializer
+_worker_context: Optional[CryptContext] = None
+
+
+def _init_worker(options: dict) -> None:
+    global _worker_context
+    _worker_context = CryptContext(**options)
+
+
+def _hash(password: str) -> str:
+    return _worker_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return _worker_context.verify_and_update(password, hashed)
+
+
+def bulk_hash_executor(workers: int) -> ProcessPoolExecutor:
+    """Process pool for hashing many passwords at once, e.g. during imports"""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context_options(),))
+
+
+def hash_many(executor: Executor, passwords: List[str], chunksize: int = 16) -> List[str]:
+    """Hash passwords in parallel on an executor from bulk_hash_executor"""
+    return list(executor.map(_hash, passwords, chunksize=chunksize))
+
+
+class HashPool:
+    """Runs password hashing off the event loop on a bounded worker pool
+
+    At most `size` hashes run at once and `queue_size` more may wait; past
+    that, submissions fail fast with HashPoolFull instead of queueing
+    unboundedly. A size of 0 uses a single in-process thread, which is
+    handy for development and tests.
+    """
+
+    def __init__(self, size: int, queue_size: int, options: dict):
+        self.size = size
+        self.queue_size = queue_size
+        self.options = options
+        self._slots = threading.BoundedSemaphore(max(size, 1) + queue_size)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the app never forks workers
+        with self._lock:
+            if self._executor is None:
+                if self.size > 0:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.size, initializer=_init_worker, initargs=(self.options,)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, initializer=_init_worker, initargs=(self.options,)
+                    )
+            return self._executor
+
+    async def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolFull()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also returns a new hash when the stored one is deprecated"""
+        return await self._submit(_verify_and_update, password, hashed)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+hash_pool = HashPool(
+    size=settings.HASH_POOL_SIZE,
+    queue_size=settings.HASH_QUEUE_SIZE,
+    options=context_options(),
+)
@@ -0,0 +1,226 @@
+import csv
+import io
+import json
+from concurrent.futures import Executor
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.hashing import hash_many
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+IMPORT_BATCH_SIZE = 1000
+
+# Column limits of the users table, checked before rows reach COPY
+MAX_LENGTHS = {"name": 255, "email": 255, "subscription_plan": 50}
+
+STAGING_DDL = """
+CREATE TEMP TABLE user_import_staging (
+    line integer NOT NULL,
+    name varchar(255) NOT NULL,
+    email varchar(255) NOT NULL,
+    hashed_password varchar(255) NOT NULL,
+    role userrole NOT NULL,
+    subscription_plan varchar(50) NOT NULL
+) ON COMMIT DROP
+"""
+
+MERGE_SQL = """
+INSERT INTO users (name, email, hashed_password, role, subscription_plan, status, is_email_verified)
+SELECT name, email, hashed_password, role, subscription_plan, 'active', false
+FROM user_import_staging
+ORDER BY line
+ON CONFLICT (email) DO {action}
+RETURNING email, (xmax = 0) AS inserted
+"""
+
+MERGE_ACTIONS = {
+    "skip": "NOTHING",
+    # Existing accounts keep their password; profile fields follow the file
+    "update": "UPDATE SET name = EXCLUDED.name, role = EXCLUDED.role, "
+              "subscription_plan = EXCLUDED.subscription_plan, updated_at = now()",
+}
+
+
+def read_rows(stream: BinaryIO, format: str) -> Iterator[Tuple[int, object]]:
+    """Yield (line number, parsed row) pairs from a CSV or NDJSON byte stream"""
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(text_stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, e
+
+
+def _error(line: int, email, message: str) -> dict:
+    return {"line": line, "email": email, "error": message}
+
+
+def validate_rows(
+    items: List[Tuple[int, object]], seen: Dict[str, int]
+) -> Tuple[List[Tuple[int, UserCreate]], List[dict]]:
+    """Validate a batch against UserCreate; `seen` tracks emails across batches"""
+    valid = []
+    errors = []
+    for line, data in items:
+        if isinstance(data, json.JSONDecodeError):
+            errors.append(_error(line, None, f"Invalid JSON: {data.msg}"))
+            continue
+        if not isinstance(data, dict):
+            errors.append(_error(line, None, "Row must be an object"))
+            continue
+
+        # Blank CSV cells fall back to the schema defaults
+        data = {key: value for key, value in data.items() if key and value not in ("", None)}
+        try:
+            user = UserCreate(**data)
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+            # The report's email is a string; a malformed one is already named in the message
+            email = data.get("email")
+            errors.append(_error(line, email if isinstance(email, str) else None, message))
+            continue
+
+        too_long = [field for field, limit in MAX_LENGTHS.items() if len(getattr(user, field) or "") > limit]
+        if too_long:
+            errors.append(_error(line, user.email, f"Too long: {', '.join(too_long)}"))
+            continue
+        if user.email in seen:
+            errors.append(_error(line, user.email, f"Duplicate of line {seen[user.email]}"))
+            continue
+
+        seen[user.email] = line
+        valid.append((line, user))
+    return valid, errors
+
+
+def _merge_postgresql(db: Session, rows: List[tuple], on_conflict: str) -> Tuple[int, int]:
+    """COPY rows into a temp staging table and merge them into users"""
+    connection = db.connection()
+    connection.execute(text(STAGING_DDL))
+    raw = connection.connection.driver_connection
+    with raw.cursor() as cursor:
+        with cursor.copy(
+            "COPY user_import_staging (line, name, email, hashed_password, role, subscription_plan) FROM STDIN"
+        ) as copy:
+            for row in rows:
+                copy.write_row(row)
+    merged = connection.execute(text(MERGE_SQL.format(action=MERGE_ACTIONS[on_conflict]))).all()
+    # A rejected batch is merged again in parts within the same transaction
+    connection.execute(text("DROP TABLE user_import_staging"))
+    inserted = sum(1 for row in merged if row.inserted)
+    return inserted, len(merged) - inserted
+
+
+def _merge_generic(db: Session, rows: List[tuple], on_conflict: str) -> Tuple[int, int]:
+    """INSERT ... ON CONFLICT for backends without COPY (SQLite)"""
+    emails = [row[2] for row in rows]
+    existing = set(db.scalars(select(User.email).where(User.email.in_(emails))))
+    stmt = sqlite_insert(User).values([
+        {"name": name, "email": email, "hashed_password": hashed, "role": role, "subscription_plan": plan}
+        for _, name, email, hashed, role, plan in rows
+    ])
+    if on_conflict == "update":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["email"],
+            set_={
+                "name": stmt.excluded.name,
+                "role": stmt.excluded.role,
+                "subscription_plan": stmt.excluded.subscription_plan,
+                # onupdate defaults are not applied to ON CONFLICT DO UPDATE
+                "updated_at": func.now(),
+            },
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["email"])
+    db.execute(stmt)
+    inserted = len(set(emails) - existing)
+    return inserted, len(existing) if on_conflict == "update" else 0
+
+
+def _merge_isolating(db: Session, merge, rows: List[tuple], on_conflict: str, errors: List[dict]) -> Tuple[int, int]:
+    """Merge rows in savepoints, halving whatever fails until the rejected rows are isolated
+
+    Rejected rows are appended to `errors`; the rest are merged. Costs about
+    two merges per rejected row and halving step.
+    """
+    try:
+        with db.begin_nested():
+            return merge(db, rows, on_conflict)
+    except Exception as e:
+        if len(rows) == 1:
+            line, _, email = rows[0][:3]
+            # The driver's message without the context lines PostgreSQL appends
+            reason = str(getattr(e, "orig", e)).splitlines()[0]
+            errors.append(_error(line, email, f"Rejected by the database: {reason}"))
+            return 0, 0
+    middle = len(rows) // 2
+    first = _merge_isolating(db, merge, rows[:middle], on_conflict, errors)
+    second = _merge_isolating(db, merge, rows[middle:], on_conflict, errors)
+    return first[0] + second[0], first[1] + second[1]
+
+
+def import_users(
+    db: Session,
+    stream: BinaryIO,
+    format: str,
+    executor: Executor,
+    on_conflict: str = "skip",
+    batch_size: int = IMPORT_BATCH_SIZE,
+    progress=None,
+) -> dict:
+    """Stream a CSV/NDJSON file into users, one transaction per batch
+
+    Invalid rows are reported with their line number and skipped. When the
+    database rejects a batch it is merged again in halves, within
+    savepoints, until the rows it rejects are isolated; only those are
+    reported and the rest of the batch is imported.
+    """
+    merge = _merge_postgresql if db.bind.dialect.name == "postgresql" else _merge_generic
+    report = {"inserted": 0, "updated": 0, "skipped": 0, "errors": []}
+    seen: Dict[str, int] = {}
+    rows_iter = read_rows(stream, format)
+
+    while True:
+        items = list(islice(rows_iter, batch_size))
+        if not items:
+            break
+        valid, errors = validate_rows(items, seen)
+        report["errors"].extend(errors)
+        if not valid:
+            continue
+
+        hashes = hash_many(executor, [user.password for _, user in valid])
+        rows = [
+            (line, user.name, user.email, hashed, user.role.value, user.subscription_plan)
+            for (line, user), hashed in zip(valid, hashes)
+        ]
+        rejected = []
+        try:
+            inserted, updated = merge(db, rows, on_conflict)
+            db.commit()
+        except Exception:
+            db.rollback()
+            inserted, updated = _merge_isolating(db, merge, rows, on_conflict, rejected)
+            db.commit()
+        report["errors"].extend(rejected)
+
+        report["inserted"] += inserted
+        report["updated"] += updated
+        report["skipped"] += len(rows) - inserted - updated - len(rejected)
+        if progress:
+            progress(report)
+
+    return report
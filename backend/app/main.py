@@ -1,37 +1,63 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+"""
+FastAPI application
+
+`create_app()` builds the application; importing this module only loads
+FastAPI and the settings. Routers, middleware and the modules behind them
+are imported when an app is created, and the database engines and the
+password hash context when they are first used, so scripts and Alembic
+that import app modules do not pay for the web stack, and a server that
+preloads the app (gunicorn --preload, see gunicorn.conf.py) imports
+everything once before forking its workers.
+
+`app` is created on first access, so `uvicorn app.main:app` and
+`from app.main import app` keep working; `uvicorn --factory
+app.main:create_app` builds a fresh one.
+"""
+from fastapi import FastAPI, Response
+from contextlib import asynccontextmanager, suppress
+import asyncio
+import logging
 from app.config import settings
-from app.database import get_db
-from app.models.user import User
-from app.auth import verify_password, create_access_token, get_password_hash
-from app.schemas.user import Token, LoginResponse, LoginUser
-from app.api.admin import users, reports
-from pydantic import BaseModel
-
-app = FastAPI(
-    title="Jiva Admin API",
-    description="Admin API for Jiva Business Platform",
-    version="1.0.0"
-)
-
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
-class LoginRequest(BaseModel):
-    email: str
-    password: str
-
-
-@app.get("/")
-def root():
+
+
+# uvicorn's error logger is its general log, shown at INFO by default
+logger = logging.getLogger("uvicorn.error")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    import app.database as database
+    from app.activity import activity_tracker
+    from app.expiry import expire_plans_periodically
+    from app.hashing import hash_pool
+    from app.metrics import MULTIPROCESS, sample_pools_periodically
+
+    status = database.pool_status()
+    for name, engine_status in status["engines"].items():
+        logger.info(
+            "Database engine %s: %s, pre_ping=%s, recycle=%ss", name,
+            ", ".join(f"{key}={value}" for key, value in engine_status.items()
+                      if key not in ("checked_out", "checked_in", "overflow")),
+            status["pre_ping"], status["recycle_seconds"],
+        )
+    tasks = [asyncio.create_task(activity_tracker.flush_periodically())]
+    if settings.METRICS_ENABLED and MULTIPROCESS:
+        tasks.append(asyncio.create_task(sample_pools_periodically(database.pool_engines)))
+    if settings.PLAN_EXPIRY_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            expire_plans_periodically(settings.PLAN_EXPIRY_INTERVAL_SECONDS, settings.PLAN_EXPIRY_BATCH_SIZE)
+        ))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    # Last-seen timestamps recorded since the previous flush
+    await activity_tracker.aflush()
+    hash_pool.shutdown()
+
+
+async def root():
     """API health check"""
     return {
         "status": "ok",
@@ -40,77 +66,95 @@ def root():
     }
 
 
-@app.post(f"{settings.API_V1_PREFIX}/admin/auth/login", response_model=LoginResponse)
-def admin_login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    """Admin login endpoint"""
-    user = db.query(User).filter(User.email == login_data.email).first()
-    
-    if not user or not verify_password(login_data.password, user.hashed_password):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    # Create access token
-    access_token = create_access_token(data={"sub": user.email})
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": LoginUser(id=user.id, email=user.email, name=user.name, role=user.role)
-    }
-
-
-# Include routers
-app.include_router(
-    users.router,
-    prefix=f"{settings.API_V1_PREFIX}/admin/users",
-    tags=["Admin - Users"]
-)
-
-app.include_router(
-    reports.router,
-    prefix=f"{settings.API_V1_PREFIX}/admin/reports",
-    tags=["Admin - Reports"]
-)
-
-
-# Placeholder for subscriptions routes
-@app.get(f"{settings.API_V1_PREFIX}/admin/subscriptions/plans")
-def get_subscription_plans():
-    """Get all subscription plans (placeholder)"""
-    return {
-        "success": True,
-        "plans": [
-            {
-                "id": "1",
-                "name": "Free",
-                "price": 0,
-                "duration": "monthly",
-                "features": ["Basic features", "5 projects", "Community support"]
-            },
-            {
-                "id": "2",
-                "name": "Premium",
-                "price": 29.99,
-                "duration": "monthly",
-                "features": ["All Free features", "Unlimited projects", "Priority support", "Advanced analytics"]
-            },
-            {
-                "id": "3",
-                "name": "Enterprise",
-                "price": 99.99,
-                "duration": "monthly",
-                "features": ["All Premium features", "Custom integrations", "Dedicated support", "SLA guarantee"]
-            }
-        ]
-    }
-
-
-@app.get(f"{settings.API_V1_PREFIX}/admin/subscriptions")
-def get_subscriptions():
-    """Get all subscriptions (placeholder)"""
-    return {
-        "success": True,
-        "subscriptions": []
-    }
+async def metrics():
+    """Prometheus scrape endpoint"""
+    from prometheus_client import CONTENT_TYPE_LATEST
+    import app.database as database
+    from app.metrics import scrape
+
+    return Response(scrape(database.pool_engines), media_type=CONTENT_TYPE_LATEST)
+
+
+def create_app() -> FastAPI:
+    """Build the application with its middleware and routers"""
+    from fastapi.middleware.cors import CORSMiddleware
+    from app.metrics import MetricsMiddleware
+    from app.querystats import QueryStatsMiddleware
+    from app.replica import ReadAfterWriteMiddleware
+    from app.api.admin import auth, users, reports, subscriptions, diagnostics
+
+    app = FastAPI(
+        title="Jiva Admin API",
+        description="Admin API for Jiva Business Platform",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    # CORS configuration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Read-after-write mark for clients that echo it instead of keeping the cookie
+        expose_headers=["X-Last-Write"],
+    )
+
+    if settings.METRICS_ENABLED:
+        # Wraps CORS so the whole request is timed
+        app.add_middleware(MetricsMiddleware)
+        app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+
+    # Marks clients whose writes must be visible to their next reads
+    app.add_middleware(ReadAfterWriteMiddleware)
+
+    # Outermost, so the per-request SQL counters are visible to every other layer
+    app.add_middleware(QueryStatsMiddleware)
+
+    app.add_api_route("/", root, methods=["GET"])
+
+    # Include routers
+    app.include_router(
+        auth.router,
+        prefix=f"{settings.API_V1_PREFIX}/admin/auth",
+        tags=["Admin - Auth"]
+    )
+
+    app.include_router(
+        users.router,
+        prefix=f"{settings.API_V1_PREFIX}/admin/users",
+        tags=["Admin - Users"]
+    )
+
+    app.include_router(
+        reports.router,
+        prefix=f"{settings.API_V1_PREFIX}/admin/reports",
+        tags=["Admin - Reports"]
+    )
+
+    app.include_router(
+        subscriptions.router,
+        prefix=f"{settings.API_V1_PREFIX}/admin/subscriptions",
+        tags=["Admin - Subscriptions"]
+    )
+
+    app.include_router(
+        diagnostics.router,
+        prefix=f"{settings.API_V1_PREFIX}/admin/diagnostics",
+        tags=["Admin - Diagnostics"]
+    )
+
+    return app
+
+
+def __getattr__(name: str):
+    # Module-level `app`, created by the first `app.main:app` lookup
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Optional
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.querystats import current_stats
+
+# Metrics live in their own registry so /metrics only exposes what we record
+registry = CollectorRegistry()
+
+# Set before prometheus_client is imported when several processes serve the
+# app (gunicorn.conf.py does): every process writes its samples to files in
+# that directory and /metrics merges them, whichever worker answers
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# How often each worker copies its pool usage into the gauges in multiprocess
+# mode; the worker answering a scrape also refreshes its own first
+POOL_SAMPLE_SECONDS = 5
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=registry,
+)
+REQUESTS = Counter(
+    "http_requests",
+    "Requests by route template and status code",
+    ["method", "route", "status"],
+    registry=registry,
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being served",
+    ["method"],
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size by route template",
+    ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+    registry=registry,
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements issued per request by route template",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+    registry=registry,
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per request by route template",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+    registry=registry,
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+    registry=registry,
+)
+# Summed over the live workers in multiprocess mode
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out",
+    ["engine"],
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond pool_size",
+    ["engine"],
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool size",
+    ["engine"],
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+PLAN_EXPIRY_USERS = Counter(
+    "plan_expiry_downgraded_users",
+    "Users moved to the Free plan after their paid plan lapsed",
+    registry=registry,
+)
+PLAN_EXPIRY_BATCH_SECONDS = Histogram(
+    "plan_expiry_batch_duration_seconds",
+    "Time to claim and downgrade one batch of expired plans",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=registry,
+)
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# Requests that matched no route share one label instead of one per raw path
+UNMATCHED = "unmatched"
+
+
+class TimedPoolMixin:
+    """Records how long each connection checkout waits on the pool"""
+
+    engine_label = "sync"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.engine_label).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def sample_pools(engines: Callable[[], Dict[str, Optional[Engine]]]) -> None:
+    """Copy the current usage of the engines' connection pools into the pool gauges"""
+    for name, engine in engines().items():
+        pool = getattr(engine, "pool", None)
+        if not isinstance(pool, QueuePool):
+            continue
+        POOL_CHECKED_OUT.labels(name).set(pool.checkedout())
+        POOL_OVERFLOW.labels(name).set(max(pool.overflow(), 0))
+        POOL_SIZE.labels(name).set(pool.size())
+
+
+async def sample_pools_periodically(engines: Callable[[], Dict[str, Optional[Engine]]]) -> None:
+    """Keep this worker's pool gauges current for scrapes answered by other workers"""
+    while True:
+        sample_pools(engines)
+        await asyncio.sleep(POOL_SAMPLE_SECONDS)
+
+
+def scrape(engines: Callable[[], Dict[str, Optional[Engine]]]) -> bytes:
+    """Text exposition of every metric, merged over all workers in multiprocess mode"""
+    sample_pools(engines)
+    if not MULTIPROCESS:
+        return generate_latest(registry)
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged)
+    return generate_latest(merged)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and response size per route template
+
+    The route is read from the scope after the app has run, so the labels
+    are templates like /api/admin/users/{user_id} rather than raw paths.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # Label lookups take a lock; resolved children are reused per label set
+        self._children: Dict[tuple, tuple] = {}
+        self._counters: Dict[tuple, object] = {}
+        self._in_progress = {method: IN_PROGRESS.labels(method) for method in METHODS | {"OTHER"}}
+
+    def _record(self, method: str, route: str, status: int, elapsed: float, size: int) -> None:
+        children = self._children.get((method, route))
+        if children is None:
+            children = tuple(metric.labels(method, route) for metric in (
+                REQUEST_LATENCY, RESPONSE_SIZE, REQUEST_STATEMENTS, REQUEST_DB_TIME))
+            self._children[(method, route)] = children
+        counter = self._counters.get((method, route, status))
+        if counter is None:
+            counter = self._counters[(method, route, status)] = REQUESTS.labels(method, route, str(status))
+        children[0].observe(elapsed)
+        children[1].observe(size)
+        counter.inc()
+        # Set by QueryStatsMiddleware, which wraps this one
+        stats = current_stats.get()
+        if stats is not None:
+            children[2].observe(stats.statements)
+            children[3].observe(stats.db_time)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in METHODS else "OTHER"
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = self._in_progress[method]
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            self._record(method, getattr(scope.get("route"), "path", UNMATCHED), status, elapsed, size)
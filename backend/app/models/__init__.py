@@ -1,3 +1,8 @@
 from app.models.user import User, UserStatus, UserRole
+from app.models.metrics import UserMetricsDaily, RollupState, UserCounter
+from app.models.billing import Plan, Subscription, SubscriptionStatus, Payment, PaymentStatus, RevenueDaily
 
-__all__ = ["User", "UserStatus", "UserRole"]
+__all__ = [
+    "User", "UserStatus", "UserRole", "UserMetricsDaily", "RollupState", "UserCounter",
+    "Plan", "Subscription", "SubscriptionStatus", "Payment", "PaymentStatus", "RevenueDaily",
+]
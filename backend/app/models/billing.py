@@ -0,0 +1,213 @@
+from sqlalchemy import (
+    BigInteger, Boolean, Column, Date, DateTime, DDL, Enum, ForeignKey, Index, Integer, JSON, String, event, text
+)
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+
+class SubscriptionStatus(str, enum.Enum):
+    active = "active"
+    canceled = "canceled"
+    expired = "expired"
+
+
+class PaymentStatus(str, enum.Enum):
+    succeeded = "succeeded"
+    failed = "failed"
+    refunded = "refunded"
+
+
+class Plan(Base):
+    """Subscription plan; users.subscription_plan holds the plan name"""
+    __tablename__ = "plans"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(50), unique=True, nullable=False)
+    price_cents = Column(Integer, nullable=False, default=0)
+    currency = Column(String(3), nullable=False, default="USD")
+    billing_interval = Column(String(20), nullable=False, default="monthly")
+    features = Column(JSON, nullable=False, default=list)
+    is_active = Column(Boolean, nullable=False, default=True)
+    sort_order = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # The plan catalog reloads when this moves
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<Plan {self.name}>"
+
+
+class Subscription(Base):
+    """A user's subscription to a plan, from signup until it is canceled or expires"""
+    __tablename__ = "subscriptions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)
+    status = Column(Enum(SubscriptionStatus), default=SubscriptionStatus.active, nullable=False)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    current_period_end = Column(Date(), nullable=True)
+    # Set when the subscription is canceled or expires
+    ended_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Admin listing order and "started in window" counts
+        Index("ix_subscriptions_started_at_id", "started_at", "id"),
+        Index("ix_subscriptions_user_id_started_at", "user_id", "started_at"),
+        # Active subscription counts and lookups by user
+        Index("ix_subscriptions_active_user_id", "user_id",
+              postgresql_where=text("status = 'active'"), sqlite_where=text("status = 'active'")),
+        # Churn: subscriptions ended in a window, with their start for the cohort filter
+        Index("ix_subscriptions_ended_at", "ended_at", "started_at",
+              postgresql_where=text("ended_at IS NOT NULL"), sqlite_where=text("ended_at IS NOT NULL")),
+    )
+
+    def __repr__(self):
+        return f"<Subscription {self.id} user={self.user_id}>"
+
+
+class Payment(Base):
+    """One charge against a subscription; amounts are in the plan currency's minor unit"""
+    __tablename__ = "payments"
+
+    # SQLite only auto-increments INTEGER primary keys
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False)
+    plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)
+    amount_cents = Column(Integer, nullable=False)
+    currency = Column(String(3), nullable=False, default="USD")
+    status = Column(Enum(PaymentStatus), default=PaymentStatus.succeeded, nullable=False)
+    paid_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Paying users per window as an index-only range read
+        Index("ix_payments_succeeded_paid_at", "paid_at", "user_id", "amount_cents",
+              postgresql_where=text("status = 'succeeded'"), sqlite_where=text("status = 'succeeded'")),
+        Index("ix_payments_subscription_id_paid_at", "subscription_id", "paid_at"),
+        Index("ix_payments_user_id_paid_at", "user_id", "paid_at"),
+    )
+
+    def __repr__(self):
+        return f"<Payment {self.id} {self.amount_cents} {self.currency}>"
+
+
+class RevenueDaily(Base):
+    """Succeeded payments per UTC day and plan, kept exact by triggers on payments"""
+    __tablename__ = "revenue_daily"
+
+    day = Column(Date(), primary_key=True)
+    plan_id = Column(Integer, primary_key=True)
+    revenue_cents = Column(BigInteger, nullable=False, default=0)
+    payment_count = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<RevenueDaily {self.day} plan={self.plan_id}: {self.revenue_cents}>"
+
+
+# PostgreSQL: statement-level triggers fold each statement's transition
+# tables into the affected (day, plan) rows, in key order like user_counters
+POSTGRESQL_REVENUE_TRIGGERS = """
+CREATE OR REPLACE FUNCTION revenue_daily_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM revenue_daily;
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO revenue_daily AS r (day, plan_id, revenue_cents, payment_count)
+        SELECT (paid_at AT TIME ZONE 'UTC')::date, plan_id, sum(amount_cents), count(*)
+        FROM new_rows WHERE status = 'succeeded' GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (day, plan_id) DO UPDATE SET
+            revenue_cents = r.revenue_cents + EXCLUDED.revenue_cents,
+            payment_count = r.payment_count + EXCLUDED.payment_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO revenue_daily AS r (day, plan_id, revenue_cents, payment_count)
+        SELECT (paid_at AT TIME ZONE 'UTC')::date, plan_id, -sum(amount_cents), -count(*)
+        FROM old_rows WHERE status = 'succeeded' GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (day, plan_id) DO UPDATE SET
+            revenue_cents = r.revenue_cents + EXCLUDED.revenue_cents,
+            payment_count = r.payment_count + EXCLUDED.payment_count;
+    ELSE
+        -- Refunds and corrections: take out the old row, add the new one
+        INSERT INTO revenue_daily AS r (day, plan_id, revenue_cents, payment_count)
+        SELECT day, plan_id, sum(amount_cents), sum(payments)
+        FROM (
+            SELECT (paid_at AT TIME ZONE 'UTC')::date AS day, plan_id, amount_cents::bigint AS amount_cents, 1 AS payments
+            FROM new_rows WHERE status = 'succeeded'
+            UNION ALL
+            SELECT (paid_at AT TIME ZONE 'UTC')::date, plan_id, -amount_cents::bigint, -1
+            FROM old_rows WHERE status = 'succeeded'
+        ) changes
+        GROUP BY 1, 2 HAVING sum(amount_cents) <> 0 OR sum(payments) <> 0 ORDER BY 1, 2
+        ON CONFLICT (day, plan_id) DO UPDATE SET
+            revenue_cents = r.revenue_cents + EXCLUDED.revenue_cents,
+            payment_count = r.payment_count + EXCLUDED.payment_count;
+    END IF;
+    RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS revenue_daily_insert ON payments;
+DROP TRIGGER IF EXISTS revenue_daily_update ON payments;
+DROP TRIGGER IF EXISTS revenue_daily_delete ON payments;
+DROP TRIGGER IF EXISTS revenue_daily_truncate ON payments;
+CREATE TRIGGER revenue_daily_insert AFTER INSERT ON payments
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION revenue_daily_apply();
+CREATE TRIGGER revenue_daily_update AFTER UPDATE ON payments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION revenue_daily_apply();
+CREATE TRIGGER revenue_daily_delete AFTER DELETE ON payments
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION revenue_daily_apply();
+CREATE TRIGGER revenue_daily_truncate AFTER TRUNCATE ON payments
+    FOR EACH STATEMENT EXECUTE FUNCTION revenue_daily_apply();
+"""
+
+# SQLite: row-level triggers, only for succeeded payments, with the same
+# INSERT ... WHERE NOT EXISTS as the user_counters triggers
+_SQLITE_REVENUE_ADD = """
+        INSERT INTO revenue_daily (day, plan_id, revenue_cents, payment_count)
+        SELECT date(NEW.paid_at), NEW.plan_id, 0, 0
+        WHERE NOT EXISTS (SELECT 1 FROM revenue_daily WHERE day = date(NEW.paid_at) AND plan_id = NEW.plan_id);
+        UPDATE revenue_daily SET revenue_cents = revenue_cents + NEW.amount_cents, payment_count = payment_count + 1
+        WHERE day = date(NEW.paid_at) AND plan_id = NEW.plan_id;
+"""
+_SQLITE_REVENUE_SUBTRACT = """
+        UPDATE revenue_daily SET revenue_cents = revenue_cents - OLD.amount_cents, payment_count = payment_count - 1
+        WHERE day = date(OLD.paid_at) AND plan_id = OLD.plan_id;
+"""
+SQLITE_REVENUE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS revenue_daily_insert AFTER INSERT ON payments
+    WHEN NEW.status = 'succeeded'
+    BEGIN{_SQLITE_REVENUE_ADD}    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS revenue_daily_update_old AFTER UPDATE OF status, amount_cents, paid_at, plan_id ON payments
+    WHEN OLD.status = 'succeeded'
+    BEGIN{_SQLITE_REVENUE_SUBTRACT}    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS revenue_daily_update_new AFTER UPDATE OF status, amount_cents, paid_at, plan_id ON payments
+    WHEN NEW.status = 'succeeded'
+    BEGIN{_SQLITE_REVENUE_ADD}    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS revenue_daily_delete AFTER DELETE ON payments
+    WHEN OLD.status = 'succeeded'
+    BEGIN{_SQLITE_REVENUE_SUBTRACT}    END
+    """,
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_revenue_triggers(metadata, connection, **kw):
+    """Install the revenue_daily triggers whenever create_all() builds the schema"""
+    if not {table.name for table in kw.get("tables") or ()} & {"payments", "revenue_daily"}:
+        return
+    if connection.dialect.name == "postgresql":
+        connection.execute(DDL(POSTGRESQL_REVENUE_TRIGGERS))
+    elif connection.dialect.name == "sqlite":
+        for statement in SQLITE_REVENUE_TRIGGERS:
+            connection.execute(DDL(statement))
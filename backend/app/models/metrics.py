@@ -0,0 +1,154 @@
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Date, DDL, event
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class UserMetricsDaily(Base):
+    """Per-day user rollup feeding the dashboard and reports"""
+    __tablename__ = "user_metrics_daily"
+    
+    day = Column(Date(), primary_key=True)
+    
+    # Users who signed up on this day
+    new_users = Column(Integer, nullable=False, default=0)
+    
+    # Users whose last_active falls on this day (frozen once the day leaves the activity window)
+    last_seen_users = Column(Integer, nullable=False, default=0)
+    
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<UserMetricsDaily {self.day}>"
+
+
+class RollupState(Base):
+    """High-water mark of the last incremental rollup run"""
+    __tablename__ = "rollup_state"
+    
+    name = Column(String(64), primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    
+    def __repr__(self):
+        return f"<RollupState {self.name}>"
+
+
+class UserCounter(Base):
+    """Number of users per status, role and plan, kept exact by triggers on users"""
+    __tablename__ = "user_counters"
+    
+    status = Column(String(20), primary_key=True)
+    role = Column(String(20), primary_key=True)
+    # '' stands for users without a plan, primary key columns cannot be NULL
+    subscription_plan = Column(String(50), primary_key=True)
+    user_count = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<UserCounter {self.status}/{self.role}/{self.subscription_plan}: {self.user_count}>"
+
+
+# PostgreSQL: statement-level triggers aggregate each statement's transition
+# tables, so a COPY or bulk UPDATE touches every counter row once. Rows are
+# upserted in key order to keep lock order consistent across transactions.
+POSTGRESQL_COUNTER_TRIGGERS = """
+CREATE OR REPLACE FUNCTION user_counters_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM user_counters;
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO user_counters AS c (status, role, subscription_plan, user_count)
+        SELECT status::text, role::text, coalesce(subscription_plan, ''), count(*)
+        FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, role, subscription_plan)
+        DO UPDATE SET user_count = c.user_count + EXCLUDED.user_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO user_counters AS c (status, role, subscription_plan, user_count)
+        SELECT status::text, role::text, coalesce(subscription_plan, ''), -count(*)
+        FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, role, subscription_plan)
+        DO UPDATE SET user_count = c.user_count + EXCLUDED.user_count;
+    ELSE
+        -- Most updates leave status, role and plan alone and net out to nothing
+        INSERT INTO user_counters AS c (status, role, subscription_plan, user_count)
+        SELECT status, role, subscription_plan, sum(delta)
+        FROM (
+            SELECT status::text, role::text, coalesce(subscription_plan, '') AS subscription_plan, 1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT status::text, role::text, coalesce(subscription_plan, ''), -1
+            FROM old_rows
+        ) changes
+        GROUP BY 1, 2, 3 HAVING sum(delta) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (status, role, subscription_plan)
+        DO UPDATE SET user_count = c.user_count + EXCLUDED.user_count;
+    END IF;
+    RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS user_counters_insert ON users;
+DROP TRIGGER IF EXISTS user_counters_update ON users;
+DROP TRIGGER IF EXISTS user_counters_delete ON users;
+DROP TRIGGER IF EXISTS user_counters_truncate ON users;
+CREATE TRIGGER user_counters_insert AFTER INSERT ON users
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION user_counters_apply();
+CREATE TRIGGER user_counters_update AFTER UPDATE ON users
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION user_counters_apply();
+CREATE TRIGGER user_counters_delete AFTER DELETE ON users
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION user_counters_apply();
+CREATE TRIGGER user_counters_truncate AFTER TRUNCATE ON users
+    FOR EACH STATEMENT EXECUTE FUNCTION user_counters_apply();
+"""
+
+# SQLite has row-level triggers only; the UPDATE one fires just for rows
+# whose status, role or plan actually changed. Missing counter rows are
+# created with INSERT ... WHERE NOT EXISTS because an upsert on users
+# would turn INSERT OR IGNORE inside the trigger into an abort.
+SQLITE_COUNTER_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS user_counters_insert AFTER INSERT ON users BEGIN
+        INSERT INTO user_counters (status, role, subscription_plan, user_count)
+        SELECT NEW.status, NEW.role, coalesce(NEW.subscription_plan, ''), 0
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_counters
+            WHERE status = NEW.status AND role = NEW.role AND subscription_plan = coalesce(NEW.subscription_plan, '')
+        );
+        UPDATE user_counters SET user_count = user_count + 1
+        WHERE status = NEW.status AND role = NEW.role AND subscription_plan = coalesce(NEW.subscription_plan, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_counters_update
+    AFTER UPDATE OF status, role, subscription_plan ON users
+    WHEN OLD.status IS NOT NEW.status OR OLD.role IS NOT NEW.role
+        OR OLD.subscription_plan IS NOT NEW.subscription_plan
+    BEGIN
+        UPDATE user_counters SET user_count = user_count - 1
+        WHERE status = OLD.status AND role = OLD.role AND subscription_plan = coalesce(OLD.subscription_plan, '');
+        INSERT INTO user_counters (status, role, subscription_plan, user_count)
+        SELECT NEW.status, NEW.role, coalesce(NEW.subscription_plan, ''), 0
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_counters
+            WHERE status = NEW.status AND role = NEW.role AND subscription_plan = coalesce(NEW.subscription_plan, '')
+        );
+        UPDATE user_counters SET user_count = user_count + 1
+        WHERE status = NEW.status AND role = NEW.role AND subscription_plan = coalesce(NEW.subscription_plan, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_counters_delete AFTER DELETE ON users BEGIN
+        UPDATE user_counters SET user_count = user_count - 1
+        WHERE status = OLD.status AND role = OLD.role AND subscription_plan = coalesce(OLD.subscription_plan, '');
+    END
+    """,
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_counter_triggers(metadata, connection, **kw):
+    """Install the user_counters triggers whenever create_all() builds the schema"""
+    if not {table.name for table in kw.get("tables") or ()} & {"users", "user_counters"}:
+        return
+    if connection.dialect.name == "postgresql":
+        connection.execute(DDL(POSTGRESQL_COUNTER_TRIGGERS))
+    elif connection.dialect.name == "sqlite":
+        for statement in SQLITE_COUNTER_TRIGGERS:
+            connection.execute(DDL(statement))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Enum, Boolean
+from sqlalchemy import DDL, Column, Integer, String, DateTime, Date, Enum, Boolean, Index, event, text
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -19,9 +19,10 @@ class UserRole(str, enum.Enum):
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
-    email = Column(String(255), unique=True, index=True, nullable=False)
+    # The unique constraint's index serves exact lookups (login, auth)
+    email = Column(String(255), unique=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     status = Column(Enum(UserStatus), default=UserStatus.active, nullable=False)
     role = Column(Enum(UserRole), default=UserRole.user, nullable=False)
@@ -30,7 +31,8 @@ class User(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
-    last_active = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Moved by app.activity as authenticated requests come in, not by edits
+    last_active = Column(DateTime(timezone=True), server_default=func.now())
     
     # Additional fields
     phone = Column(String(20), nullable=True)
@@ -41,5 +43,40 @@ class User(Base):
     plan_valid_until = Column(Date(), nullable=True)
     reference = Column(String(255), nullable=True)
     
+    __table_args__ = (
+        # Keyset pagination order for the admin user list
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Admin search: exact email lookups and trigram substring matches.
+        # The trigram indexes need pg_trgm and exist on PostgreSQL only, as
+        # in the migration that adds them
+        Index("ix_users_email_lower", func.lower(email)),
+        Index("ix_users_name_trgm", name, postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_users_email_trgm", email, postgresql_using="gin",
+              postgresql_ops={"email": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        # Change detection and activity window scans of the metrics rollup job
+        Index("ix_users_updated_at", "updated_at"),
+        Index("ix_users_last_active", "last_active"),
+        # Bulk changes by status, role or plan walk the matching rows in id
+        # order; only the minority values are indexed, the majority ones are
+        # served by walking the primary key
+        Index("ix_users_status_id", "status", "id",
+              postgresql_where=text("status <> 'active'"), sqlite_where=text("status <> 'active'")),
+        Index("ix_users_role_id", "role", "id",
+              postgresql_where=text("role <> 'user'"), sqlite_where=text("role <> 'user'")),
+        Index("ix_users_paid_plan_id", "subscription_plan", "id",
+              postgresql_where=text("subscription_plan <> 'Free'"), sqlite_where=text("subscription_plan <> 'Free'")),
+        # Expiry of paid plans
+        Index("ix_users_paid_plan_valid_until", "plan_valid_until", "id",
+              postgresql_where=text("subscription_plan <> 'Free'"), sqlite_where=text("subscription_plan <> 'Free'")),
+    )
+    
     def __repr__(self):
         return f"<User {self.email}>"
+
+
+@event.listens_for(User.__table__, "before_create")
+def _create_trgm_extension(table, connection, **kw):
+    """Install pg_trgm for the trigram indexes whenever create_all() builds the users table"""
+    if connection.dialect.name == "postgresql":
+        connection.execute(DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple, Union
+from sqlalchemy import String, tuple_, type_coerce
+from sqlalchemy.sql.elements import ColumnElement
+
+# Keyset ids are Integer primary keys
+MAX_CURSOR_ID = 2**31 - 1
+
+# Label of the extra column cursor_columns() selects
+CURSOR_KEY = "cursor_key"
+
+
+def encode_cursor(position: Union[datetime, str], row_id: int) -> str:
+    """Encode the (position, id) of the last row as an opaque cursor"""
+    if isinstance(position, datetime):
+        position = position.isoformat()
+    raw = json.dumps({"c": position, "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position, row_id = data["c"], int(data["i"])
+        # Validates the position; it is bound as text on SQLite
+        datetime.fromisoformat(position)
+    except (TypeError, KeyError, ValueError, OverflowError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not 1 <= row_id <= MAX_CURSOR_ID:
+        raise ValueError("Invalid cursor")
+    return position, row_id
+
+
+def cursor_columns(column, dialect: str) -> list:
+    """Columns a keyset page selects besides its own, for row_cursor()
+
+    SQLite stores datetimes as text in the format that wrote them: server
+    defaults (CURRENT_TIMESTAMP) omit the fraction SQLAlchemy writes, and
+    rows sort by that text. Its cursors carry the stored text, so both
+    sides of the comparison are text in the same format.
+    """
+    if dialect == "sqlite":
+        return [type_coerce(column, String).label(CURSOR_KEY)]
+    return []
+
+
+def row_cursor(row, position: str) -> str:
+    """Cursor after `row`, whose `position` column orders the page"""
+    return encode_cursor(row._mapping.get(CURSOR_KEY, getattr(row, position)), row.id)
+
+
+def before_cursor(column, id_column, cursor: str, dialect: str) -> ColumnElement:
+    """Rows following `cursor` in (column, id) descending order; ValueError if malformed"""
+    position, row_id = decode_cursor(cursor)
+    if dialect == "sqlite":
+        return tuple_(type_coerce(column, String), id_column) < (position, row_id)
+    return tuple_(column, id_column) < (datetime.fromisoformat(position), row_id)
@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Optional
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.billing import Plan
+
+
+def plan_payload(plan: Plan) -> dict:
+    return {
+        "id": str(plan.id),
+        "name": plan.name,
+        "price": round(plan.price_cents / 100, 2),
+        "currency": plan.currency,
+        "duration": plan.billing_interval,
+        "features": plan.features,
+    }
+
+
+class PlanCatalog:
+    """In-memory copy of the active plans, served as a pre-rendered JSON body
+
+    The body is built once per change of the plans table rather than per
+    request. At most every `check_interval` seconds one request compares
+    the table's version (row count and latest updated_at) with the loaded
+    one and rebuilds the body when it moved; invalidate() forces that
+    check on the next request, e.g. right after this process edits a plan.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._body: Optional[bytes] = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def cached(self) -> Optional[bytes]:
+        """The response body, or None when it is missing or due for a version check"""
+        if self._body is None or time.monotonic() - self._checked_at >= self.check_interval:
+            return None
+        return self._body
+
+    def load(self, db: Session) -> bytes:
+        """Check the table version and return the body, rebuilding it if the plans changed"""
+        with self._lock:
+            if self.cached() is not None:
+                return self._body
+            version = tuple(db.execute(select(func.count(), func.max(Plan.updated_at)).select_from(Plan)).one())
+            if self._body is None or version != self._version:
+                plans = db.scalars(
+                    select(Plan).where(Plan.is_active.is_(True)).order_by(Plan.sort_order, Plan.id)
+                ).all()
+                self._body = orjson.dumps({"success": True, "plans": [plan_payload(plan) for plan in plans]})
+                self._version = version
+                self.reloads += 1
+            self._checked_at = time.monotonic()
+            return self._body
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._checked_at = 0.0
+
+
+plan_catalog = PlanCatalog(check_interval=settings.PLAN_CATALOG_CHECK_SECONDS)
@@ -0,0 +1,108 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TooManyStatements(Exception):
+    """Raised when a request exceeds SQL_STATEMENT_LIMIT with SQL_STATEMENT_LIMIT_RAISE on"""
+
+
+class QueryStats:
+    """SQL statements and database time spent on behalf of one request"""
+
+    __slots__ = ("scope", "statements", "db_time")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.statements = 0
+        self.db_time = 0.0
+
+    @property
+    def route(self) -> Optional[str]:
+        if self.scope is None:
+            return None
+        # Route template once routing has happened, the raw path before that
+        return getattr(self.scope.get("route"), "path", self.scope.get("path"))
+
+
+# Stats of the request being served; threadpool and run_sync calls inherit it
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        limit = settings.SQL_STATEMENT_LIMIT
+        if limit is not None and stats.statements > limit:
+            message = f"{stats.route} issued more than {limit} SQL statements"
+            if settings.SQL_STATEMENT_LIMIT_RAISE:
+                raise TooManyStatements(message)
+            if stats.statements == limit + 1:
+                logger.warning("%s; latest: %s", message, " ".join(statement.split()))
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = current_stats.get()
+    if stats is not None:
+        stats.db_time += elapsed
+    if settings.SLOW_QUERY_MS is not None and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        # Parameters are left out, they can hold emails and password hashes
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s",
+            elapsed * 1000, stats.route if stats else "<no request>", " ".join(statement.split()),
+        )
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for failed statements
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def attach_query_listeners(engine: Engine) -> None:
+    """Count and time every statement run through `engine` (use .sync_engine for async engines)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware collecting QueryStats per request
+
+    The totals are returned in a Server-Timing header (visible in browser
+    dev tools) and, when SQL_STATEMENT_LIMIT is set, checked against it.
+    Work done after the response has started, like streamed exports,
+    still counts towards the limit but not towards the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                timing = f'db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} SQL"'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_stats.reset(token)
@@ -0,0 +1,80 @@
+import math
+import time
+from typing import Optional
+from starlette.requests import cookie_parser
+from app.config import settings
+
+# Methods that never change data and so never pin a client to the primary
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Time of the client's last successful write, as Unix seconds. The client
+# carries it (browsers as a cookie, other clients by echoing the header),
+# so whichever worker or host serves the next read can honour it
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "x-last-write"
+
+# Marks dated this far in the future still count, for clocks between hosts
+CLOCK_SKEW_SECONDS = 1.0
+
+
+def last_write_at(scope) -> Optional[float]:
+    """The write time a request carries in its header or cookie, if any"""
+    value = None
+    for name, raw in scope.get("headers", ()):
+        if name == LAST_WRITE_HEADER.encode("latin-1"):
+            value = raw.decode("latin-1")
+            break
+        if name == b"cookie":
+            value = cookie_parser(raw.decode("latin-1")).get(LAST_WRITE_COOKIE, value)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def read_from_primary(scope) -> bool:
+    """Whether a read must bypass the replica to observe the client's own writes
+
+    True while the client's last write is younger than REPLICA_MAX_LAG_SECONDS.
+    A forged mark only sends that client's reads to the primary for at
+    most that long, so it is not signed.
+    """
+    written = last_write_at(scope)
+    if written is None:
+        return False
+    age = time.time() - written
+    return -CLOCK_SKEW_SECONDS <= age < settings.REPLICA_MAX_LAG_SECONDS
+
+
+def write_mark_headers(written: float) -> list:
+    """Response headers handing the client its write time"""
+    value = f"{written:.3f}"
+    max_age = math.ceil(settings.REPLICA_MAX_LAG_SECONDS)
+    cookie = f"{LAST_WRITE_COOKIE}={value}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax"
+    return [
+        (b"set-cookie", cookie.encode("latin-1")),
+        (LAST_WRITE_HEADER.encode("latin-1"), value.encode("latin-1")),
+    ]
+
+
+class ReadAfterWriteMiddleware:
+    """ASGI middleware marking clients whose writes succeeded
+
+    The mark is added to the response start, so the client has it before
+    it can see the result and issue a follow-up read.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message = dict(message, headers=list(message.get("headers", ())) + write_mark_headers(time.time()))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
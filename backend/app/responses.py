@@ -0,0 +1,14 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson
+
+    Serializes enums, dates and datetimes natively, with UTC written as
+    "Z" the way pydantic does, so plain dicts of column values can be
+    returned without passing through response_model validation.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
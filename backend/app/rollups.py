@@ -0,0 +1,162 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from app.analytics import ACTIVE_WINDOW, ROLLUP_NAME, as_date, bucket_expr, utc
+from app.models.metrics import RollupState, UserMetricsDaily
+from app.models.user import User
+
+# Rows committed by transactions that started before the previous run can
+# carry an updated_at just below its watermark, so every run looks back a bit
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Group days into contiguous (first, last) ranges"""
+    runs: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def _cohort_counts(db: Session, first: date, last: date) -> Dict[date, int]:
+    """Number of users created on each day between first and last"""
+    dialect = db.bind.dialect.name
+    day = bucket_expr("daily", dialect, utc(User.created_at, dialect)).label("day")
+    rows = db.execute(
+        select(day, func.count(User.id))
+        .where(User.created_at >= _day_start(first), User.created_at < _day_start(last + timedelta(days=1)))
+        .group_by(day)
+    ).all()
+    return {as_date(d): n for d, n in rows}
+
+
+def _last_seen_counts(db: Session, first: date, last: date) -> Dict[date, int]:
+    """Number of users whose last_active falls on each day between first and last"""
+    dialect = db.bind.dialect.name
+    day = bucket_expr("daily", dialect, utc(User.last_active, dialect)).label("day")
+    rows = db.execute(
+        select(day, func.count(User.id))
+        .where(User.last_active >= _day_start(first), User.last_active < _day_start(last + timedelta(days=1)))
+        .group_by(day)
+    ).all()
+    return {as_date(d): n for d, n in rows}
+
+
+def _write_days(db: Session, cohort_days: Iterable[date], last_seen_days: Iterable[date]) -> int:
+    """Recompute and upsert the given days; returns the number of rows written"""
+    cohorts: Dict[date, int] = {}
+    for first, last in _runs(cohort_days):
+        counts = _cohort_counts(db, first, last)
+        for offset in range((last - first).days + 1):
+            day = first + timedelta(days=offset)
+            cohorts[day] = counts.get(day, 0)
+
+    last_seen: Dict[date, int] = {}
+    for first, last in _runs(last_seen_days):
+        counts = _last_seen_counts(db, first, last)
+        for offset in range((last - first).days + 1):
+            day = first + timedelta(days=offset)
+            last_seen[day] = counts.get(day, 0)
+
+    days = set(cohorts) | set(last_seen)
+    if not days:
+        return 0
+
+    existing = {
+        row.day: row
+        for row in db.query(UserMetricsDaily).filter(UserMetricsDaily.day.in_(days))
+    }
+    for day in days:
+        row = existing.get(day)
+        if row is None:
+            row = UserMetricsDaily(day=day, new_users=0, last_seen_users=0)
+            db.add(row)
+        if day in cohorts:
+            row.new_users = cohorts[day]
+        if day in last_seen:
+            row.last_seen_users = last_seen[day]
+    return len(days)
+
+
+def _activity_window(today: date) -> List[date]:
+    first = today - timedelta(days=ACTIVE_WINDOW.days)
+    return [first + timedelta(days=i) for i in range(ACTIVE_WINDOW.days + 1)]
+
+
+def _set_watermark(db: Session, watermark: datetime) -> None:
+    state = db.get(RollupState, ROLLUP_NAME)
+    if state is None:
+        db.add(RollupState(name=ROLLUP_NAME, watermark=watermark))
+    else:
+        state.watermark = watermark
+
+
+def backfill_user_metrics(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    chunk_days: int = 31,
+    progress=None,
+) -> int:
+    """Rebuild the rollup between start and end (inclusive), one chunk per transaction
+
+    Defaults to the whole history. The watermark is moved to the time the
+    backfill started so the next incremental run picks up concurrent writes.
+    """
+    started_at = db.scalar(select(func.now()))
+    today = datetime.now(timezone.utc).date()
+    if start is None:
+        first_signup = db.scalar(select(func.min(User.created_at)))
+        start = first_signup.date() if first_signup else today
+    end = end or today
+
+    written = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        days = [chunk_start + timedelta(days=i) for i in range((chunk_end - chunk_start).days + 1)]
+        written += _write_days(db, days, [d for d in days if d >= today - ACTIVE_WINDOW])
+        db.commit()
+        if progress:
+            progress(chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+
+    _set_watermark(db, started_at)
+    db.commit()
+    return written
+
+
+def refresh_user_metrics(db: Session) -> int:
+    """Incrementally refresh the rollup for days touched since the last run
+
+    Cohort days are those of users whose row changed after the watermark;
+    the last-seen counts of the activity window are always recomputed since
+    last_active moves every day. Falls back to a full backfill on first run.
+    """
+    state = db.get(RollupState, ROLLUP_NAME)
+    if state is None:
+        return backfill_user_metrics(db)
+
+    started_at = db.scalar(select(func.now()))
+    since = state.watermark - WATERMARK_OVERLAP
+    dialect = db.bind.dialect.name
+    changed_day = bucket_expr("daily", dialect, utc(User.created_at, dialect))
+    cohort_days = [
+        as_date(d)
+        for d in db.scalars(
+            select(changed_day).where(or_(User.updated_at > since, User.created_at > since)).distinct()
+        )
+    ]
+
+    written = _write_days(db, cohort_days, _activity_window(datetime.now(timezone.utc).date()))
+    _set_watermark(db, started_at)
+    db.commit()
+    return written
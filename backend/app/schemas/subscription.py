@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from datetime import datetime, date
+from typing import Optional
+from app.models.billing import SubscriptionStatus
+
+
+class SubscriptionResponse(BaseModel):
+    id: int
+    user_id: int
+    user_name: str
+    user_email: str
+    plan: str
+    status: SubscriptionStatus
+    started_at: datetime
+    current_period_end: Optional[date]
+    ended_at: Optional[datetime]
+
+
+class SubscriptionListResponse(BaseModel):
+    subscriptions: list[SubscriptionResponse]
+    page: Optional[int] = None
+    limit: int
+    next_cursor: Optional[str] = None
+    success: bool = True
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from datetime import datetime, date
 from typing import Optional
+from app.config import settings
 from app.models.user import UserStatus, UserRole
 
 
@@ -26,6 +27,72 @@ class UserUpdate(BaseModel):
     plan_valid_until: Optional[date] = None
 
 
+class UserBulkFilter(BaseModel):
+    status: Optional[UserStatus] = None
+    role: Optional[UserRole] = None
+    subscription_plan: Optional[str] = None
+
+    @model_validator(mode="after")
+    def require_criterion(self):
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("filter needs at least one criterion")
+        return self
+
+
+class UserBulkChanges(BaseModel):
+    status: Optional[UserStatus] = None
+    subscription_plan: Optional[str] = None
+    plan_valid_until: Optional[date] = None
+
+    @model_validator(mode="after")
+    def require_change(self):
+        if not self.model_fields_set:
+            raise ValueError("changes needs at least one field")
+        for field in ("status", "subscription_plan"):
+            if field in self.model_fields_set and getattr(self, field) is None:
+                raise ValueError(f"{field} cannot be null")
+        return self
+
+
+class UserBulkRequest(BaseModel):
+    ids: Optional[list[int]] = Field(None, min_length=1, max_length=settings.BULK_MAX_IDS)
+    filter: Optional[UserBulkFilter] = None
+    changes: UserBulkChanges
+    chunk_size: int = Field(1000, ge=1, le=10000)
+
+    @model_validator(mode="after")
+    def require_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("provide exactly one of ids or filter")
+        return self
+
+
+class UserBulkChunk(BaseModel):
+    chunk: int
+    updated: int
+    last_id: int
+
+
+class UserBulkResponse(BaseModel):
+    updated: int
+    chunks: list[UserBulkChunk]
+    success: bool = True
+
+
+class UserImportError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    error: str
+
+
+class UserImportResponse(BaseModel):
+    inserted: int
+    updated: int
+    skipped: int
+    errors: list[UserImportError]
+    success: bool = True
+
+
 class UserResponse(UserBase):
     id: int
     status: UserStatus
@@ -45,9 +112,10 @@ class UserResponse(UserBase):
 
 class UserListResponse(BaseModel):
     users: list[UserResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     limit: int
+    next_cursor: Optional[str] = None
     success: bool = True
 
 
@@ -0,0 +1,74 @@
+import re
+from typing import Optional, Tuple, TypeVar
+from sqlalchemy import Select, func, or_
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.elements import ColumnElement
+from app.models.user import User
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# pg_trgm cannot use an index for patterns shorter than one trigram
+MIN_TRIGRAM_LENGTH = 3
+
+# Largest users.id (a 32-bit Integer); longer numbers cannot be ids
+MAX_USER_ID = 2**31 - 1
+
+# Both ORM queries and select() statements support .filter()
+Q = TypeVar("Q", Query, Select)
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_user_search(
+    query: Q, search: str, dialect: str
+) -> Tuple[Q, Optional[ColumnElement]]:
+    """Filter a User query or select() by a free-text search term
+
+    Numeric input and complete email addresses take exact-match fast paths
+    that hit the primary key and the lower(email) index; a number only
+    matches the user with that id, not names or emails containing it, so
+    the lookup stays a primary key probe. Anything else is a
+    substring match on name/email, which PostgreSQL serves from the pg_trgm
+    GIN indexes; there the returned rank expression orders results by
+    trigram similarity. The rank is None when the caller should keep its
+    default ordering.
+    """
+    term = search.strip()
+
+    # isdigit() alone accepts digits such as "²" that int() rejects
+    if term.isascii() and term.isdigit() and int(term) <= MAX_USER_ID:
+        return query.filter(User.id == int(term)), None
+
+    if EMAIL_RE.match(term):
+        return query.filter(func.lower(User.email) == term.lower()), None
+
+    pattern = f"%{escape_like(term)}%"
+    query = query.filter(
+        or_(
+            User.name.ilike(pattern, escape="\\"),
+            User.email.ilike(pattern, escape="\\"),
+        )
+    )
+
+    if dialect != "postgresql" or len(term) < MIN_TRIGRAM_LENGTH:
+        return query, None
+
+    rank = func.greatest(func.similarity(User.name, term), func.similarity(User.email, term))
+    return query, rank
+
+
+def count_matches(db: Session, query: Select, approximate: bool = False) -> int:
+    """Number of rows a filtered select() returns
+
+    With `approximate` on PostgreSQL this is the planner's row estimate from
+    EXPLAIN, which needs no scan but can be far off for selective filters.
+    Other backends always count exactly.
+    """
+    if approximate and db.bind.dialect.name == "postgresql":
+        compiled = query.compile(dialect=db.bind.dialect, compile_kwargs={"render_postcompile": True})
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return db.scalar(query.with_only_columns(func.count(), maintain_column_froms=True))
@@ -0,0 +1,112 @@
+"""
+Benchmark comparing requests/sec of the API with DB_ASYNC off and on
+
+Starts uvicorn once per mode against the same database and drives it with
+concurrent clients for a fixed duration. The admin user must already exist
+(see scripts/seed_admin.py).
+
+Usage:
+    python benchmarks/async_vs_sync.py --concurrency 64 --duration 10 \
+        --path "/api/admin/users?limit=10" --path /api/admin/reports
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))
+
+from app.auth import create_access_token
+
+
+def start_server(port: int, async_mode: bool, dsn: str) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC=str(async_mode).lower(), SQL_ECHO="false")
+    if dsn:
+        env["DATABASE_URL"] = dsn
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+async def drive(base_url: str, paths, token: str, concurrency: int, duration: float) -> dict:
+    """Hit the paths round-robin from `concurrency` clients for `duration` seconds"""
+    completed = 0
+    errors = 0
+    deadline = time.monotonic() + duration
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+        async def worker(offset: int):
+            nonlocal completed, errors
+            i = offset
+            while time.monotonic() < deadline:
+                response = await client.get(paths[i % len(paths)])
+                i += 1
+                if response.status_code == 200:
+                    completed += 1
+                else:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return {"requests": completed, "errors": errors, "rps": completed / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync and async database modes")
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Database URL (default: .env)")
+    parser.add_argument("--email", default="admin@jiva.com", help="Admin account used to sign requests")
+    parser.add_argument("--path", action="append", dest="paths", help="Request path, repeatable")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    paths = args.paths or ["/api/admin/users?limit=10", "/api/admin/reports"]
+
+    token = create_access_token(data={"sub": args.email})
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    results = {}
+    for mode, async_mode in (("sync", False), ("async", True)):
+        server = start_server(args.port, async_mode, args.dsn)
+        try:
+            wait_until_ready(base_url)
+            # Warm up connection pools before measuring
+            asyncio.run(drive(base_url, paths, token, args.concurrency, 1))
+            results[mode] = asyncio.run(drive(base_url, paths, token, args.concurrency, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"[INFO] {mode:>5}: {results[mode]['rps']:.1f} req/s "
+              f"({results[mode]['requests']} ok, {results[mode]['errors']} errors)")
+
+    speedup = results["async"]["rps"] / results["sync"]["rps"] if results["sync"]["rps"] else float("inf")
+    print(f"[DONE] async/sync throughput ratio: {speedup:.2f}x at concurrency {args.concurrency}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Benchmark suite for the API hot paths
+
+Builds a throwaway database for every table size, fills it with the
+generator from scripts/generate_users.py and drives the app in-process
+through httpx's ASGI transport. For each endpoint it reports p50/p95/p99
+latency, throughput and SQL statements per request, and writes the
+results to JSON; pass an earlier file as --baseline to print the change.
+
+Without --dsn every size gets its own temporary SQLite file. With --dsn
+the tables of that database are DROPPED and recreated for every size, so
+only point it at a disposable PostgreSQL database. Set DB_ASYNC=true in
+the environment to measure the async database mode.
+
+Usage:
+    python benchmarks/endpoints.py --sizes 10000,100000 --requests 200 --output bench.json
+    python benchmarks/endpoints.py --dsn postgresql+psycopg://postgres@localhost/jiva_bench \
+        --sizes 1000000 --baseline bench.json --only users_first_page,users_search
+"""
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import tempfile
+from pathlib import Path
+from datetime import datetime, timezone
+
+import httpx
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+# Keep SQL echo out of the measurements
+os.environ["SQL_ECHO"] = "false"
+
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import Engine
+import app.database as database
+from app.auth import create_access_token, get_password_hash, principal_cache
+from app.cache import report_cache
+from app.config import settings
+from app.hashing import hash_pool
+from app.main import app
+from app.models.billing import Plan
+from app.models.user import User, UserRole
+from app.pagination import cursor_columns, row_cursor
+from app.rollups import backfill_user_metrics
+from scripts.generate_payments import generate_billing
+from scripts.generate_users import UserGenerator, copy_rows, insert_rows
+
+ADMIN_EMAIL = "bench-admin@example.com"
+ADMIN_PASSWORD = "benchmark-password"
+API = settings.API_V1_PREFIX
+# Same rows as the billing migration seeds
+PLANS = [("Free", 0), ("Premium", 2999), ("Enterprise", 9999)]
+
+
+class StatementCounter:
+    """Counts SQL statements executed by any engine in this process"""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self._increment)
+
+    def _increment(self, *args):
+        self.count += 1
+
+
+def prepare_database(url: str, size: int, seed: int, rollup: bool) -> dict:
+    """Recreate the schema at `url`, load `size` users and return request fixtures"""
+    database.configure_database(url)
+    engine = database.engine
+    postgresql = engine.dialect.name == "postgresql"
+
+    if postgresql:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    database.Base.metadata.drop_all(engine)
+    database.Base.metadata.create_all(engine)
+
+    db = database.SessionLocal()
+    try:
+        db.add_all([Plan(name=name, price_cents=price, sort_order=position)
+                    for position, (name, price) in enumerate(PLANS)])
+        db.add(User(name="Bench Admin", email=ADMIN_EMAIL, hashed_password=get_password_hash(ADMIN_PASSWORD),
+                    role=UserRole.super_admin, subscription_plan="Enterprise"))
+        db.commit()
+
+        now = datetime.now(timezone.utc)
+        generator = UserGenerator(seed=seed, hashed_password=get_password_hash("password123"),
+                                  domain="bench.example.com", years=3, now=now)
+        write = copy_rows if postgresql else insert_rows
+        for start in range(0, size, 50000):
+            write(db, (generator.row(n) for n in range(start, min(start + 50000, size))))
+            db.commit()
+        generate_billing(db, seed, now)
+        if postgresql:
+            db.execute(text("ANALYZE"))
+            db.commit()
+        if rollup:
+            backfill_user_metrics(db)
+
+        ids = list(db.scalars(select(User.id).order_by(User.id)))
+        # Keyset position ~90% of the way through the newest-first listing
+        deep = db.execute(
+            select(User.created_at, User.id, *cursor_columns(User.created_at, engine.dialect.name))
+            .order_by(User.created_at.desc(), User.id.desc())
+            .offset(len(ids) * 9 // 10)
+            .limit(1)
+        ).one()
+    finally:
+        db.close()
+
+    rng = random.Random(seed)
+    return {
+        "ids": rng.sample(ids, min(len(ids), 1000)),
+        "deep_page": max(1, len(ids) * 9 // 10 // 20),
+        "deep_cursor": row_cursor(deep, "created_at"),
+    }
+
+
+def build_requests(fixtures: dict) -> dict:
+    """Endpoint name -> function of the request number returning (method, path, request kwargs)"""
+    ids = fixtures["ids"]
+    return {
+        "users_first_page": lambda i: ("GET", f"{API}/admin/users", {"params": {"limit": 20}}),
+        "users_page_100": lambda i: ("GET", f"{API}/admin/users", {"params": {"limit": 100}}),
+        "users_deep_page": lambda i: ("GET", f"{API}/admin/users",
+                                      {"params": {"limit": 20, "page": fixtures["deep_page"]}}),
+        "users_deep_cursor": lambda i: ("GET", f"{API}/admin/users",
+                                        {"params": {"limit": 20, "cursor": fixtures["deep_cursor"]}}),
+        "users_search": lambda i: ("GET", f"{API}/admin/users", {"params": {"limit": 20, "search": "smith"}}),
+        "users_total": lambda i: ("GET", f"{API}/admin/users", {"params": {"limit": 20, "include_total": "true"}}),
+        "users_search_total": lambda i: ("GET", f"{API}/admin/users",
+                                         {"params": {"limit": 20, "search": "smith", "include_total": "true",
+                                                     "approximate": "true"}}),
+        "user_detail": lambda i: ("GET", f"{API}/admin/users/{ids[i % len(ids)]}", {}),
+        "user_update": lambda i: ("PUT", f"{API}/admin/users/{ids[i % len(ids)]}",
+                                  {"json": {"name": f"Bench User {i}"}}),
+        "login": lambda i: ("POST", f"{API}/admin/auth/login",
+                            {"json": {"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}}),
+        "reports": lambda i: ("GET", f"{API}/admin/reports", {}),
+        "analytics": lambda i: ("GET", f"{API}/admin/reports/analytics", {"params": {"period": "monthly"}}),
+        "subscriptions": lambda i: ("GET", f"{API}/admin/subscriptions", {"params": {"limit": 20}}),
+        "subscription_plans": lambda i: ("GET", f"{API}/admin/subscriptions/plans", {}),
+    }
+
+
+def percentile(quantiles, p: int) -> float:
+    return round(quantiles[p - 1] * 1000, 3)
+
+
+async def measure(client, make_request, requests: int, concurrency: int, counter: StatementCounter,
+                  cold_cache: bool = False) -> dict:
+    """Send `requests` requests from `concurrency` workers and summarise them"""
+    for i in range(min(10, requests)):  # Warm pools and caches
+        method, path, kwargs = make_request(i)
+        await client.request(method, path, **kwargs)
+
+    latencies = []
+    errors = 0
+    queue = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            method, path, kwargs = make_request(i)
+            if cold_cache:
+                report_cache.invalidate()
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    statements_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(quantiles, 50),
+        "p95_ms": percentile(quantiles, 95),
+        "p99_ms": percentile(quantiles, 99),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "rps": round(requests / elapsed, 1),
+        "statements_per_request": round((counter.count - statements_before) / requests, 2),
+    }
+
+
+async def run_size(fixtures: dict, names, requests: int, concurrency: int, counter: StatementCounter,
+                   cold_cache: bool) -> dict:
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': ADMIN_EMAIL})}"}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    all_requests = build_requests(fixtures)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for name in names:
+            results[name] = await measure(client, all_requests[name], requests, concurrency, counter, cold_cache)
+            r = results[name]
+            print(f"[INFO] {name:<18} p50 {r['p50_ms']:8.2f}ms  p95 {r['p95_ms']:8.2f}ms  "
+                  f"p99 {r['p99_ms']:8.2f}ms  {r['rps']:8.1f} req/s  {r['statements_per_request']:5.2f} SQL/req"
+                  + (f"  {r['errors']} errors" if r["errors"] else ""))
+    return results
+
+
+def print_comparison(results: dict, baseline: dict) -> None:
+    print("[INFO] Change against baseline (negative latency change is faster)")
+    for size, endpoints in results.items():
+        for name, current in endpoints.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if not previous:
+                continue
+            changes = "  ".join(
+                f"{key} {(current[key] - previous[key]) / previous[key] * 100:+6.1f}%"
+                for key in ("p50_ms", "p95_ms", "rps") if previous[key]
+            )
+            statements = current["statements_per_request"] - previous["statements_per_request"]
+            print(f"[INFO] {size:>8} {name:<18} {changes}  SQL/req {statements:+.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths")
+    parser.add_argument("--dsn", help="Disposable database to use; its tables are dropped (default: temp SQLite)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated users table sizes")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent clients")
+    parser.add_argument("--only", help="Comma separated endpoint names")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rollup", action="store_true", help="Build user_metrics_daily before measuring")
+    parser.add_argument("--cold-cache", action="store_true", help="Clear the report cache before every request")
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--baseline", type=Path, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(build_requests({"ids": [0]}))
+    counter = StatementCounter()
+    workdir = tempfile.TemporaryDirectory(prefix="jiva-bench-")
+    results = {}
+
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            url = args.dsn or f"sqlite:///{Path(workdir.name) / f'bench_{size}.db'}"
+            print(f"[INFO] Preparing {size} users...")
+            fixtures = prepare_database(url, size, args.seed, args.rollup)
+            # Cached principals and reports belong to the previous database
+            principal_cache.invalidate()
+            report_cache.invalidate()
+            results[str(size)] = asyncio.run(run_size(fixtures, names, args.requests, args.concurrency, counter,
+                                                        args.cold_cache))
+    finally:
+        hash_pool.shutdown()
+        database.engine.dispose()
+        workdir.cleanup()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "dialect": database.engine.dialect.name,
+            "db_async": settings.DB_ASYNC,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "rollup": args.rollup,
+            "cold_cache": args.cold_cache,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"[OK] Results written to {args.output}")
+
+    if args.baseline:
+        print_comparison(results, json.loads(args.baseline.read_text()))
+
+
+if __name__ == "__main__":
+    main()
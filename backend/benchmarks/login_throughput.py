@@ -0,0 +1,59 @@
+"""
+Benchmark of password verification throughput against hashing pool size
+
+Runs the same argon2 verification the login endpoint performs through
+app.hashing.HashPool at several pool sizes and reports verifications per
+second, i.e. the login throughput ceiling of one API worker.
+
+Usage:
+    python benchmarks/login_throughput.py --sizes 1,2,4,8 --logins 200
+"""
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.hashing import HashPool, context_options
+
+
+async def measure(size: int, logins: int, hashed: str) -> float:
+    pool = HashPool(size=size, queue_size=size * 4, options=context_options())
+    # Keep submissions within the pool's capacity so none are rejected
+    in_flight = asyncio.Semaphore(max(size, 1) + pool.queue_size)
+
+    async def login():
+        async with in_flight:
+            verified, _ = await pool.verify_and_update("benchmark-password", hashed)
+            assert verified
+
+    try:
+        await login()  # Start the worker processes before timing
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        return logins / (time.perf_counter() - started)
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput by hashing pool size")
+    parser.add_argument("--sizes", default="0,1,2,4", help="Comma separated pool sizes (0 = in-process thread)")
+    parser.add_argument("--logins", type=int, default=100, help="Verifications per pool size")
+    args = parser.parse_args()
+
+    pool = HashPool(size=0, queue_size=1, options=context_options())
+    hashed = asyncio.run(pool.hash("benchmark-password"))
+    pool.shutdown()
+    print(f"[INFO] Hash parameters: {hashed.rsplit('$', 2)[0]}")
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        rate = asyncio.run(measure(size, args.logins, hashed))
+        print(f"[INFO] pool size {size:>2}: {rate:8.1f} logins/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Query plan check for the admin API
+
+Seeds a throwaway database the same way as benchmarks/endpoints.py, sends
+one request to every route through the app in-process, captures the SQL
+each route runs and EXPLAINs it. A route fails the check when any of its
+statements reads `users`, `subscriptions` or `payments` with a sequential
+scan (a plain `SCAN` on SQLite), so a query that loses its index shows up before it ships. Exits
+with status 1 when a route fails.
+
+Planners prefer sequential scans on small tables whatever the indexes, so
+seed a realistic size (the default) or pass --no-seqscan, which turns
+sequential scans off on PostgreSQL and leaves only the queries that no
+index can serve.
+
+As with the endpoint benchmarks, --dsn DROPS and recreates the tables of
+the database it points at; without it a temporary SQLite file is used.
+
+Usage:
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --dsn postgresql+psycopg://postgres@localhost/jiva_bench --size 200000
+    python benchmarks/query_plans.py --only users_first_page,bulk_suspended --verbose
+"""
+import sys
+import os
+import json
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import date, timedelta
+
+import httpx
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+os.environ["SQL_ECHO"] = "false"
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import app.database as database
+from app.auth import create_access_token, principal_cache
+from app.cache import report_cache
+from app.hashing import hash_pool
+from app.main import app
+from benchmarks.endpoints import ADMIN_EMAIL, API, build_requests, prepare_database
+
+# Tables that must never be read with a full scan; the rollup and counter
+# tables are small by design
+CHECKED_TABLES = {"users", "subscriptions", "payments"}
+
+# Routes allowed to scan, per dialect, and why
+ALLOWED_SCANS = {
+    "sqlite": {
+        "users_search": "substring search has no index without pg_trgm",
+        "users_search_total": "substring search has no index without pg_trgm",
+    },
+}
+
+
+def build_plan_requests(fixtures: dict) -> dict:
+    """The benchmarked routes plus the filtered paths they do not cover"""
+    requests = build_requests(fixtures)
+    user_id = fixtures["ids"][0]
+    expires = (date.today() + timedelta(days=30)).isoformat()
+
+    def bulk(criteria: dict, changes: dict):
+        return lambda i: ("POST", f"{API}/admin/users/bulk",
+                          {"json": {"filter": criteria, "changes": changes, "chunk_size": 500}})
+
+    requests.update({
+        "users_search_id": lambda i: ("GET", f"{API}/admin/users", {"params": {"search": str(user_id)}}),
+        "users_search_email": lambda i: ("GET", f"{API}/admin/users", {"params": {"search": ADMIN_EMAIL.upper()}}),
+        "bulk_suspended": bulk({"status": "suspended"}, {"status": "suspended"}),
+        "bulk_admins": bulk({"role": "admin"}, {"subscription_plan": "Enterprise"}),
+        "bulk_premium": bulk({"subscription_plan": "Premium"}, {"plan_valid_until": expires}),
+    })
+    return requests
+
+
+class StatementRecorder:
+    """Records the statements executed by any engine in this process"""
+
+    def __init__(self):
+        self.statements = []
+        event.listen(Engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        keyword = statement.lstrip().split(None, 1)[0].upper()
+        # Inserts never scan; EXPLAINs (ours and count_matches') are skipped too
+        if keyword in ("SELECT", "WITH", "UPDATE", "DELETE") and not executemany:
+            self.statements.append((statement, parameters))
+
+
+def plan_scans(node: dict) -> list:
+    """Tables read with a sequential scan anywhere in a PostgreSQL JSON plan"""
+    scans = []
+    if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES:
+        scans.append(node["Relation Name"])
+    for child in node.get("Plans", ()):
+        scans.extend(plan_scans(child))
+    return scans
+
+
+def explain(connection, statement: str, parameters):
+    """Return (plan for display, tables read with a full scan)"""
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        return plan, plan_scans(plan[0]["Plan"])
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        words = detail.split()
+        # "SCAN users" is a full scan; "SCAN users USING INDEX ..." walks an index in order
+        if words[0] == "SCAN" and "USING" not in words and words[1].split("_")[0] in CHECKED_TABLES:
+            scans.append(words[1])
+    return [row[-1] for row in rows], scans
+
+
+def vacuum(engine) -> None:
+    """Set the visibility map like autovacuum would on a live database
+
+    Straight after a bulk load no page is marked all-visible, so PostgreSQL
+    costs index-only scans as if every row needed a heap fetch and picks
+    sequential scans for the counts the dashboard runs.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("VACUUM (ANALYZE)")
+
+
+def check_route(connection, name: str, statements, verbose: bool) -> bool:
+    """EXPLAIN a route's statements; returns False when one of them scans"""
+    allowed = ALLOWED_SCANS.get(connection.dialect.name, {})
+    scanning = []
+    for statement, parameters in statements:
+        plan, scans = explain(connection, statement, parameters)
+        if verbose:
+            print(f"[INFO] {name}: {' '.join(statement.split())}")
+            print(json.dumps(plan, indent=2, default=str))
+        if scans:
+            scanning.append((statement, scans))
+
+    if not scanning:
+        print(f"[OK] {name}: {len(statements)} statements, no sequential scans")
+        return True
+    if name in allowed:
+        print(f"[INFO] {name}: sequential scan allowed ({allowed[name]})")
+        return True
+    for statement, scans in scanning:
+        print(f"[ERROR] {name}: sequential scan on {', '.join(sorted(set(scans)))} in: "
+              f"{' '.join(statement.split())[:200]}")
+    return False
+
+
+async def check(fixtures: dict, names, no_seqscan: bool, verbose: bool) -> int:
+    """Send one request per route and EXPLAIN what it ran; returns the number of failing routes
+
+    Each route is explained straight after its request, before a later
+    route's writes can change the table statistics it was planned with.
+    """
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': ADMIN_EMAIL})}"}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    requests = build_plan_requests(fixtures)
+    recorder = StatementRecorder()
+    failures = 0
+    # Autocommit, so nothing resets SET enable_seqscan between routes
+    with database.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if no_seqscan and connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET enable_seqscan = off")
+        async with httpx.AsyncClient(transport=transport, base_url="http://plans", headers=headers) as client:
+            for name in names:
+                # Caches would hide the route's queries
+                principal_cache.invalidate()
+                report_cache.invalidate()
+                recorder.statements = []
+                method, path, kwargs = requests[name](0)
+                response = await client.request(method, path, **kwargs)
+                statements = recorder.statements
+                if response.status_code != 200:
+                    print(f"[ERROR] {name}: {method} {path} returned {response.status_code}")
+                    failures += 1
+                elif not check_route(connection, name, statements, verbose):
+                    failures += 1
+    event.remove(Engine, "before_cursor_execute", recorder._record)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when an admin route's SQL falls back to a sequential scan")
+    parser.add_argument("--dsn", help="Disposable database to use; its tables are dropped (default: temp SQLite)")
+    parser.add_argument("--size", type=int, default=100000, help="Users to seed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rollup", action="store_true", help="Build user_metrics_daily before checking")
+    parser.add_argument("--no-seqscan", action="store_true",
+                        help="Disable sequential scans on PostgreSQL so only unindexable queries fail")
+    parser.add_argument("--only", help="Comma separated route names")
+    parser.add_argument("--verbose", action="store_true", help="Print every statement and its plan")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(build_plan_requests({"ids": [0]}))
+    workdir = tempfile.TemporaryDirectory(prefix="jiva-plans-")
+    try:
+        url = args.dsn or f"sqlite:///{Path(workdir.name) / 'plans.db'}"
+        print(f"[INFO] Preparing {args.size} users...")
+        fixtures = prepare_database(url, args.size, args.seed, args.rollup)
+        vacuum(database.engine)
+        failures = asyncio.run(check(fixtures, names, args.no_seqscan, args.verbose))
+    finally:
+        hash_pool.shutdown()
+        database.engine.dispose()
+        workdir.cleanup()
+
+    if failures:
+        print(f"[ERROR] {failures} routes fall back to a sequential scan")
+        sys.exit(1)
+    print("[OK] No route reads a checked table with a sequential scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark of the user listing and export serialization paths
+
+Compares, on a throwaway database, the previous way of producing
+responses with the current one:
+
+- list:   ORM entities validated through UserListResponse and encoded with
+          the stdlib json module (what FastAPI does for response_model)
+          vs. projected column rows encoded by ORJSONResponse
+- export: NDJSON via json.dumps per row vs. orjson
+
+Each pair is checked to produce the same JSON before it is timed.
+Without --dsn a temporary SQLite file is used; a --dsn database has its
+tables DROPPED and recreated (see benchmarks/endpoints.py).
+
+Usage:
+    python benchmarks/serialization.py --size 100000 --limit 100 --iterations 500
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from pydantic import TypeAdapter
+from benchmarks.endpoints import prepare_database
+import app.database as database
+from app.api.admin.users import _list_users
+from app.exports import EXPORT_COLUMNS, _plain, encode_ndjson, iter_user_rows
+from app.models.user import User
+from app.responses import ORJSONResponse
+from app.schemas.user import UserListResponse
+
+list_adapter = TypeAdapter(UserListResponse)
+
+
+def legacy_list(db, limit: int) -> bytes:
+    """Listing as served before: full entities, response_model validation, stdlib json"""
+    users = db.query(User).order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1).all()
+    content = {"users": users[:limit], "total": None, "page": 1, "limit": limit, "next_cursor": None, "success": True}
+    validated = list_adapter.validate_python(content, from_attributes=True)
+    data = list_adapter.dump_python(validated, mode="json")
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def lean_list(db, limit: int) -> bytes:
+    _, content = _list_users(db, 1, limit, None, None, False)
+    content["next_cursor"] = None  # The legacy path above does not build cursors
+    return ORJSONResponse(content).body
+
+
+def legacy_ndjson(batches):
+    keys = [column.key for column in EXPORT_COLUMNS]
+    for batch in batches:
+        yield "".join(json.dumps({k: _plain(v) for k, v in zip(keys, row)}) + "\n" for row in batch).encode()
+
+
+def time_calls(fn, iterations: int) -> dict:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    quantiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+    }
+
+
+def report(name: str, before: dict, after: dict) -> None:
+    for label, result in (("before", before), ("after", after)):
+        print(f"[INFO] {name:<8} {label:<6} mean {result['mean_ms']:8.3f}ms  "
+              f"p50 {result['p50_ms']:8.3f}ms  p95 {result['p95_ms']:8.3f}ms")
+    print(f"[INFO] {name:<8} speedup {before['mean_ms'] / after['mean_ms']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare listing and export serialization paths")
+    parser.add_argument("--dsn", help="Disposable database to use; its tables are dropped (default: temp SQLite)")
+    parser.add_argument("--size", type=int, default=100000, help="Users in the table")
+    parser.add_argument("--limit", type=int, default=100, help="Page size of the listing")
+    parser.add_argument("--iterations", type=int, default=300, help="Listing calls per path")
+    parser.add_argument("--export-runs", type=int, default=3, help="Full exports per path")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(prefix="jiva-bench-")
+    try:
+        url = args.dsn or f"sqlite:///{Path(workdir.name) / 'serialization.db'}"
+        print(f"[INFO] Preparing {args.size} users...")
+        prepare_database(url, args.size, args.seed, rollup=False)
+
+        db = database.SessionLocal()
+        try:
+            if json.loads(legacy_list(db, args.limit)) != json.loads(lean_list(db, args.limit)):
+                print("[ERROR] Listing paths produce different JSON")
+                sys.exit(1)
+            report(
+                "list",
+                time_calls(lambda: (legacy_list(db, args.limit), db.expunge_all()), args.iterations),
+                time_calls(lambda: lean_list(db, args.limit), args.iterations),
+            )
+        finally:
+            db.close()
+
+        legacy_lines = b"".join(legacy_ndjson(iter_user_rows())).splitlines()
+        lean_lines = b"".join(encode_ndjson(iter_user_rows())).splitlines()
+        if [json.loads(line) for line in legacy_lines] != [json.loads(line) for line in lean_lines]:
+            print("[ERROR] Export paths produce different JSON")
+            sys.exit(1)
+        report(
+            "export",
+            time_calls(lambda: sum(map(len, legacy_ndjson(iter_user_rows()))), args.export_runs),
+            time_calls(lambda: sum(map(len, encode_ndjson(iter_user_rows()))), args.export_runs),
+        )
+    finally:
+        database.engine.dispose()
+        workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
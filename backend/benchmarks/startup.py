@@ -0,0 +1,247 @@
+"""
+Cold start benchmark
+
+Measures what a new process pays before it serves traffic: importing the
+models (what scripts and Alembic pay), importing app.main, building the
+app, running its startup and answering the first request, which touches
+the database. Each run is a fresh interpreter, so nothing is cached in
+memory between runs. With --server it also starts real servers and times
+the first successful response from process spawn: uvicorn, gunicorn with
+gunicorn.conf.py, and the same without preloading the app. For gunicorn
+with a single worker it then kills the worker and times the first
+response from its replacement, which is where preloading pays off.
+
+Without --dsn a temporary SQLite database is created; a --dsn database
+must already be migrated. Results are written as JSON; pass an earlier
+file as --baseline to print the change.
+
+Usage:
+    python benchmarks/startup.py --runs 10 --output startup.json
+    python benchmarks/startup.py --server uvicorn,gunicorn,gunicorn-no-preload --baseline startup.json
+"""
+import sys
+import os
+import json
+import time
+import signal
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from datetime import datetime, timezone
+
+import httpx
+
+# Add parent directory to path
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))
+
+# Served without authentication and reads the plans table
+FIRST_REQUEST_PATH = "/api/admin/subscriptions/plans"
+
+# Runs in a fresh interpreter; prints cumulative milliseconds as JSON
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.models
+models = time.perf_counter()
+import app.main
+main = time.perf_counter()
+application = app.main.app
+built = time.perf_counter()
+from starlette.testclient import TestClient
+client_ready = time.perf_counter()
+with TestClient(application) as client:
+    started_up = time.perf_counter()
+    status = client.get(sys.argv[1]).status_code
+    first = time.perf_counter()
+client_import = client_ready - built
+print(json.dumps({
+    "import_models_ms": (models - started) * 1000,
+    "import_main_ms": (main - models) * 1000,
+    "create_app_ms": (built - main) * 1000,
+    "startup_ms": (started_up - client_ready) * 1000,
+    "first_request_ms": (first - started_up) * 1000,
+    "time_to_first_request_ms": (first - started - client_import) * 1000,
+    "status": status,
+}))
+"""
+
+PROBE_KEYS = ("import_models_ms", "import_main_ms", "create_app_ms", "startup_ms", "first_request_ms",
+              "time_to_first_request_ms")
+
+SERVERS = {
+    "uvicorn": ([sys.executable, "-m", "uvicorn", "app.main:app", "--log-level", "warning"], {}),
+    "gunicorn": ([sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"], {}),
+    "gunicorn-no-preload": ([sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+                            {"GUNICORN_PRELOAD": "false"}),
+}
+
+
+def prepare_database(url: str) -> None:
+    """Create the schema and the plans in an empty database"""
+    import app.database as database
+    from app.models.billing import Plan
+    from benchmarks.endpoints import PLANS
+
+    database.configure_database(url)
+    database.Base.metadata.create_all(database.engine)
+    db = database.SessionLocal()
+    try:
+        db.add_all([Plan(name=name, price_cents=price, sort_order=position)
+                    for position, (name, price) in enumerate(PLANS)])
+        db.commit()
+    finally:
+        db.close()
+    database.engine.dispose()
+
+
+def summarise(samples) -> dict:
+    return {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1)}
+
+
+def probe(env: dict, runs: int) -> dict:
+    """Run the in-process probe `runs` times and summarise every phase"""
+    interpreter = []
+    samples = {key: [] for key in PROBE_KEYS}
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], cwd=BACKEND_DIR, env=env, check=True)
+        interpreter.append((time.perf_counter() - started) * 1000)
+
+        output = subprocess.run([sys.executable, "-c", PROBE, FIRST_REQUEST_PATH], cwd=BACKEND_DIR, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if result["status"] != 200:
+            raise RuntimeError(f"{FIRST_REQUEST_PATH} answered {result['status']}")
+        for key in PROBE_KEYS:
+            samples[key].append(result[key])
+    return {"interpreter_ms": summarise(interpreter), **{key: summarise(values) for key, values in samples.items()}}
+
+
+def wait_for_response(server: subprocess.Popen, url: str, started: float, timeout: float) -> float:
+    """Poll `url` until it answers 200; returns the milliseconds since `started`
+
+    One client serves every attempt: a new one per attempt builds an SSL
+    context each time, and that busy loop would compete with the server
+    for the CPU while it starts.
+    """
+    with httpx.Client(timeout=timeout) as client:
+        while time.perf_counter() - started < timeout:
+            try:
+                if client.get(url).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with status {server.returncode}")
+            time.sleep(0.02)
+    raise RuntimeError(f"Server did not answer within {timeout}s")
+
+
+def child_pids(pid: int) -> list:
+    """Processes whose parent is `pid` (Linux /proc)"""
+    children = []
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                # The parent pid is the second field after the parenthesised command name
+                if int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1]) == pid:
+                    children.append(int(entry.name))
+            except (OSError, IndexError, ValueError):
+                continue
+    return children
+
+
+def serve(command, env: dict, url: str, restart: bool, timeout: float = 60) -> tuple:
+    """Milliseconds from spawning `command` to its first 200 on `url`
+
+    With `restart`, also the milliseconds from killing the server's only
+    worker to the first 200 from its replacement; otherwise None.
+    """
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first = wait_for_response(server, url, started, timeout)
+        if not restart:
+            return first, None
+        for pid in child_pids(server.pid):
+            os.kill(pid, signal.SIGKILL)
+        return first, wait_for_response(server, url, time.perf_counter(), timeout)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def measure_server(name: str, env: dict, runs: int, port: int, workers: int) -> dict:
+    """Time to first response, plus worker restart time for gunicorn with one worker"""
+    command, extra_env = SERVERS[name]
+    restart = name != "uvicorn" and workers == 1 and Path("/proc").is_dir()
+    command = command + (["--port", str(port)] if name == "uvicorn" else
+                         ["--bind", f"127.0.0.1:{port}", "--workers", str(workers)])
+    env = dict(env, **extra_env)
+    samples = [serve(command, env, f"http://127.0.0.1:{port}{FIRST_REQUEST_PATH}", restart) for _ in range(runs)]
+    results = {f"server_{name}_ms": summarise([first for first, _ in samples])}
+    if restart:
+        results[f"worker_restart_{name}_ms"] = summarise([restarted for _, restarted in samples])
+    return results
+
+
+def print_comparison(results: dict, baseline: dict) -> None:
+    print("[INFO] Change against baseline (negative is faster)")
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous and previous["median_ms"]:
+            change = (current["median_ms"] - previous["median_ms"]) / previous["median_ms"] * 100
+            print(f"[INFO] {name:<38} {previous['median_ms']:9.1f}ms -> {current['median_ms']:9.1f}ms  {change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time to first request")
+    parser.add_argument("--dsn", help="Migrated database to serve from (default: temp SQLite)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--server", default="", help="Comma separated servers to start: " + ", ".join(SERVERS))
+    parser.add_argument("--workers", type=int, default=1,
+                        help="gunicorn workers; with 1, worker restart time is measured too")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", type=Path, default=Path("startup-results.json"))
+    parser.add_argument("--baseline", type=Path, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(prefix="jiva-startup-")
+    try:
+        url = args.dsn or f"sqlite:///{Path(workdir.name) / 'startup.db'}"
+        if not args.dsn:
+            prepare_database(url)
+        env = dict(os.environ, DATABASE_URL=url, SQL_ECHO="false")
+
+        results = probe(env, args.runs)
+        for key, value in results.items():
+            print(f"[INFO] {key:<38} median {value['median_ms']:8.1f}ms  min {value['min_ms']:8.1f}ms")
+        for name in filter(None, args.server.split(",")):
+            for key, value in measure_server(name, env, args.runs, args.port, args.workers).items():
+                results[key] = value
+                print(f"[INFO] {key:<38} median {value['median_ms']:8.1f}ms  min {value['min_ms']:8.1f}ms")
+    finally:
+        workdir.cleanup()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "runs": args.runs,
+            "workers": args.workers,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"[OK] Results written to {args.output}")
+
+    if args.baseline:
+        print_comparison(results, json.loads(args.baseline.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Gunicorn settings for production
+
+The app is imported and built once in the master (preload_app) and the
+workers are forked from it, so they share the imported code and start
+serving without importing anything themselves. Nothing in the app opens
+a database connection or starts the hashing pool at import time; engines
+and pools are created in each worker on first use.
+
+Metrics use prometheus_client's multiprocess mode: workers write their
+samples to files in PROMETHEUS_MULTIPROC_DIR (a fresh temporary directory
+unless set) and /metrics merges them, whichever worker answers.
+
+Usage:
+    gunicorn app.main:app -c gunicorn.conf.py
+"""
+import gc
+import glob
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:3001")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Must be set before the app, and with it prometheus_client, is imported.
+# Files left by an earlier run would be merged into this one's metrics
+_created_metrics_dir = "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+if _created_metrics_dir:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="jiva-metrics-")
+else:
+    for stale in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        os.remove(stale)
+
+
+def when_ready(server):
+    if preload_app:
+        import app.database as database
+
+        # Engines are created per worker, but their drivers can be imported once here
+        database.load_drivers()
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the collector's reach, so collections
+    # in the workers don't write to (and copy) the pages they share
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app.database as database
+
+    # Only matters if something in the master used the database
+    database.dispose_inherited_engines()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the worker's live gauges (requests in progress, pool usage); its
+    # counters and histograms stay in the totals
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if _created_metrics_dir:
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
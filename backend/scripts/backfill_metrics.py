@@ -0,0 +1,47 @@
+"""
+Script to rebuild the user_metrics_daily rollup in chunks
+
+Usage:
+    python scripts/backfill_metrics.py [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--chunk-days N]
+"""
+import sys
+import argparse
+from pathlib import Path
+from datetime import date
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.database import SessionLocal
+from app.rollups import backfill_user_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily user metrics rollup")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (default: first signup)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (default: today)")
+    parser.add_argument("--chunk-days", type=int, default=31, help="Days rebuilt per transaction")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    
+    try:
+        written = backfill_user_metrics(
+            db,
+            start=args.start,
+            end=args.end,
+            chunk_days=args.chunk_days,
+            progress=lambda first, last: print(f"[INFO] Rebuilt {first} .. {last}"),
+        )
+        print(f"[OK] Rebuilt {written} days of user metrics!")
+        
+    except Exception as e:
+        print(f"[ERROR] Error rebuilding user metrics: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
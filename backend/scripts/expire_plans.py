@@ -0,0 +1,57 @@
+"""
+Script to move users whose paid plan has lapsed to the Free plan
+
+Users are claimed in batches with SELECT ... FOR UPDATE SKIP LOCKED, so
+several workers (threads here, or API workers running the same job) can
+share the backlog without blocking each other. Each batch is one UPDATE
+committed on its own.
+
+Usage:
+    python scripts/expire_plans.py [--batch-size N] [--workers N] [--max-batches N]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.expiry import expire_plans
+
+
+def run_worker(batch_size: int, max_batches) -> int:
+    db = SessionLocal()
+    try:
+        return expire_plans(db, batch_size, max_batches=max_batches)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downgrade users whose paid plan has lapsed")
+    parser.add_argument("--batch-size", type=int, default=settings.PLAN_EXPIRY_BATCH_SIZE,
+                        help="Users claimed and downgraded per transaction")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent workers, each with its own connection")
+    parser.add_argument("--max-batches", type=int, help="Stop each worker after this many batches")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(run_worker, args.batch_size, args.max_batches) for _ in range(args.workers)]
+            expired = sum(future.result() for future in futures)
+    except Exception as e:
+        print(f"[ERROR] Error expiring plans: {e}")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    print(f"[OK] Moved {expired} users with lapsed plans to Free in {elapsed:.2f}s "
+          f"({expired / elapsed:.0f} users/s, {args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Script to generate subscriptions and payment history for load testing
+
+Every user on a paid plan that has no subscription yet gets one, started
+at signup, with a charge at the start of each billing period up to today
+or the end of their plan; plans that lapsed end as expired subscriptions.
+About 3% of charges fail and are retried a day later. Run it after
+scripts/generate_users.py. The same --seed produces the same history. On
+PostgreSQL payments are loaded with COPY; other backends fall back to
+batched INSERTs.
+
+Usage:
+    python scripts/generate_payments.py [--seed 42] [--batch-size 10000]
+"""
+import sys
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, time, timedelta, timezone
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import exists, func, insert, select, text
+from app.database import SessionLocal
+from app.models.billing import Payment, PaymentStatus, Plan, Subscription, SubscriptionStatus
+from app.models.user import User
+
+PAYMENT_COLUMNS = ("user_id", "subscription_id", "plan_id", "amount_cents", "currency", "status", "paid_at")
+
+BILLING_PERIOD = timedelta(days=30)
+FAILED_CHARGE_RATE = 0.03
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back without their zone
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class BillingGenerator:
+    """Deterministic subscriptions and payment rows for paid users"""
+
+    def __init__(self, seed: int, plans: dict, now: datetime):
+        self.rng = random.Random(seed)
+        self.plans = plans
+        self.now = now
+
+    def subscription(self, user) -> dict:
+        plan = self.plans[user.subscription_plan]
+        lapsed = user.plan_valid_until is not None and user.plan_valid_until < self.now.date()
+        return {
+            "user_id": user.id,
+            "plan_id": plan.id,
+            "status": SubscriptionStatus.expired if lapsed else SubscriptionStatus.active,
+            "started_at": as_utc(user.created_at),
+            "current_period_end": user.plan_valid_until,
+            "ended_at": datetime.combine(user.plan_valid_until, time.min, tzinfo=timezone.utc) if lapsed else None,
+        }
+
+    def payments(self, user, subscription_id: int):
+        """Payment rows ordered like PAYMENT_COLUMNS"""
+        plan = self.plans[user.subscription_plan]
+        end = self.now
+        if user.plan_valid_until is not None:
+            end = min(end, datetime.combine(user.plan_valid_until, time.min, tzinfo=timezone.utc))
+        paid_at = as_utc(user.created_at)
+        while paid_at < end:
+            if self.rng.random() < FAILED_CHARGE_RATE:
+                yield (user.id, subscription_id, plan.id, plan.price_cents, plan.currency,
+                       PaymentStatus.failed.value, paid_at)
+                paid_at += timedelta(days=1)
+            yield (user.id, subscription_id, plan.id, plan.price_cents, plan.currency,
+                   PaymentStatus.succeeded.value, min(paid_at, self.now))
+            paid_at += BILLING_PERIOD
+
+
+def copy_payments(db, rows) -> None:
+    raw = db.connection().connection.driver_connection
+    with raw.cursor() as cursor:
+        with cursor.copy(f"COPY payments ({', '.join(PAYMENT_COLUMNS)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def insert_payments(db, rows) -> None:
+    rows = [dict(zip(PAYMENT_COLUMNS, row)) for row in rows]
+    if rows:
+        db.execute(insert(Payment), rows)
+
+
+def generate_billing(db, seed: int, now: datetime, batch_size: int = 10000, log=None) -> tuple:
+    """Create subscriptions and payments for paid users without a subscription
+
+    Returns (subscriptions, payments) written. Users are walked in id order,
+    one transaction per batch.
+    """
+    plans = {plan.name: plan for plan in db.scalars(select(Plan).where(Plan.price_cents > 0))}
+    generator = BillingGenerator(seed, plans, now)
+    write = copy_payments if db.bind.dialect.name == "postgresql" else insert_payments
+    subscribed = exists().where(Subscription.user_id == User.id)
+    last_id = 0
+    subscriptions = payments = 0
+
+    while True:
+        users = db.execute(
+            select(User.id, User.subscription_plan, User.created_at, User.plan_valid_until)
+            .where(User.subscription_plan.in_(plans), User.id > last_id, ~subscribed)
+            .order_by(User.id)
+            .limit(batch_size)
+        ).all()
+        if not users:
+            break
+        subscription_ids = db.scalars(
+            insert(Subscription).returning(Subscription.id, sort_by_parameter_order=True),
+            [generator.subscription(user) for user in users],
+        ).all()
+        rows = [row for user, subscription_id in zip(users, subscription_ids)
+                for row in generator.payments(user, subscription_id)]
+        write(db, rows)
+        db.commit()
+
+        last_id = users[-1].id
+        subscriptions += len(users)
+        payments += len(rows)
+        if log:
+            log(f"[INFO] Generated {subscriptions} subscriptions and {payments} payments")
+
+    return subscriptions, payments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate subscriptions and payments for paid users")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; same seed, same history")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Users per transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+
+    try:
+        if not db.scalar(select(func.count()).select_from(Plan)):
+            print("[ERROR] The plans table is empty; run the migrations first")
+            sys.exit(1)
+
+        subscriptions, payments = generate_billing(
+            db, args.seed, datetime.now(timezone.utc), args.batch_size, log=print
+        )
+        if db.bind.dialect.name == "postgresql":
+            # Refresh planner statistics so benchmarks see the new row counts
+            db.execute(text("ANALYZE subscriptions, payments"))
+            db.commit()
+        print(f"[OK] Generated {subscriptions} subscriptions and {payments} payments with seed {args.seed}!")
+
+    except Exception as e:
+        print(f"[ERROR] Error generating payments: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
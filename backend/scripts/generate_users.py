@@ -0,0 +1,162 @@
+"""
+Script to generate synthetic users for load testing
+
+Produces N users with production-like distributions (mostly recent signups,
+a long tail of inactive accounts, a Free-heavy plan mix with paid plans
+that renew or lapse). Every user shares one precomputed password hash, so
+generation is bound by the database rather than by argon2. The same
+--seed always yields the same rows (timestamps are relative to the time of
+the run). On PostgreSQL rows are loaded with
+COPY; other backends fall back to batched INSERTs.
+
+Usage:
+    python scripts/generate_users.py --count 1000000 [--seed 42] [--batch-size 50000]
+        [--domain loadtest.example.com] [--years 3] [--password password123]
+"""
+import sys
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, insert, select, text
+from app.hashing import get_password_hash
+from app.database import SessionLocal
+from app.models.user import User
+
+COLUMNS = (
+    "name", "email", "hashed_password", "status", "role", "subscription_plan",
+    "created_at", "updated_at", "last_active", "phone", "is_email_verified",
+    "plan_valid_until", "reference",
+)
+
+FIRST_NAMES = ["John", "Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry", "Iris",
+               "Jack", "Karen", "Leo", "Mona", "Nathan", "Olivia", "Paul", "Quinn", "Rita", "Sam"]
+LAST_NAMES = ["Smith", "Johnson", "Wilson", "Davis", "Miller", "Brown", "Taylor", "Lee", "Anderson",
+              "Martinez", "White", "Harris", "Clark", "Lewis", "Young", "Walker", "Hall", "King"]
+
+# (value, weight) pairs
+STATUSES = [("active", 90), ("suspended", 4), ("pending", 6)]
+PLANS = [("Free", 70), ("Premium", 22), ("Enterprise", 8)]
+# Paid plans are billed monthly or yearly
+BILLING_DAYS = [(30, 75), (365, 25)]
+
+
+class UserGenerator:
+    """Deterministic stream of user rows (tuples ordered like COLUMNS)"""
+
+    def __init__(self, seed: int, hashed_password: str, domain: str, years: float, now: datetime):
+        self.rng = random.Random(seed)
+        self.hashed_password = hashed_password
+        self.domain = domain
+        self.span_days = years * 365
+        self.now = now
+        self.statuses = list(zip(*STATUSES))
+        self.plans = list(zip(*PLANS))
+        self.billing = list(zip(*BILLING_DAYS))
+
+    def row(self, n: int) -> tuple:
+        rng = self.rng
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+
+        # Signups grow over time: squaring a uniform draw skews ages towards zero
+        age_days = self.span_days * rng.random() ** 2
+        created_at = self.now - timedelta(days=age_days)
+        # Most users were seen recently, a long tail went quiet; never before signup
+        idle_days = min(rng.expovariate(1 / 14) if rng.random() < 0.7 else rng.uniform(0, age_days), age_days)
+        last_active = self.now - timedelta(days=idle_days)
+
+        status = rng.choices(*self.statuses)[0]
+        plan = rng.choices(*self.plans)[0]
+        plan_valid_until = None
+        if plan != "Free":
+            # Renewals stop when the user goes quiet, so long-idle plans have lapsed
+            billing_days = rng.choices(*self.billing)[0]
+            terms = int((age_days - idle_days) // billing_days) + 1
+            plan_valid_until = (created_at + timedelta(days=terms * billing_days)).date()
+
+        return (
+            f"{first} {last}",
+            f"{first.lower()}.{last.lower()}.{n}@{self.domain}",
+            self.hashed_password,
+            status,
+            "user",
+            plan,
+            created_at,
+            max(created_at, last_active - timedelta(days=rng.uniform(0, 7))),
+            last_active,
+            f"+1-555-{rng.randrange(10000):04d}" if rng.random() < 0.6 else None,
+            rng.random() < 0.85,
+            plan_valid_until,
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" if rng.random() < 0.3 else None,
+        )
+
+
+def copy_rows(db, rows) -> None:
+    raw = db.connection().connection.driver_connection
+    with raw.cursor() as cursor:
+        with cursor.copy(f"COPY users ({', '.join(COLUMNS)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def insert_rows(db, rows) -> None:
+    db.execute(insert(User), [dict(zip(COLUMNS, row)) for row in rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic users for load testing")
+    parser.add_argument("--count", type=int, required=True, help="Number of users to generate")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; same seed, same users")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows per transaction")
+    parser.add_argument("--domain", default="loadtest.example.com", help="Email domain of generated users")
+    parser.add_argument("--years", type=float, default=3, help="Signup history span")
+    parser.add_argument("--password", default="password123", help="Password shared by all generated users")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+
+    try:
+        existing = db.scalar(select(func.count()).where(User.email.like(f"%@{args.domain}")))
+        if existing:
+            print(f"[ERROR] {existing} users with @{args.domain} already exist; pass a different --domain")
+            sys.exit(1)
+
+        postgresql = db.bind.dialect.name == "postgresql"
+        write = copy_rows if postgresql else insert_rows
+        generator = UserGenerator(
+            seed=args.seed,
+            hashed_password=get_password_hash(args.password),
+            domain=args.domain,
+            years=args.years,
+            now=datetime.now(timezone.utc),
+        )
+
+        written = 0
+        while written < args.count:
+            size = min(args.batch_size, args.count - written)
+            write(db, (generator.row(n) for n in range(written, written + size)))
+            db.commit()
+            written += size
+            print(f"[INFO] Generated {written}/{args.count} users")
+
+        if postgresql:
+            # Refresh planner statistics so benchmarks see the new row counts
+            db.execute(text("ANALYZE users"))
+            db.commit()
+        print(f"[OK] Generated {written} users with seed {args.seed}!")
+
+    except Exception as e:
+        print(f"[ERROR] Error generating users: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Script to bulk import users from a CSV or NDJSON file
+
+Columns/keys: name, email, password, role (optional), subscription_plan (optional)
+
+Usage:
+    python scripts/import_users.py users.csv [--format csv|ndjson] [--on-conflict skip|update]
+        [--batch-size N] [--workers N] [--errors errors.ndjson]
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.hashing import bulk_hash_executor
+from app.imports import IMPORT_BATCH_SIZE, import_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import users")
+    parser.add_argument("path", type=Path, help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Default: from the file extension")
+    parser.add_argument("--on-conflict", choices=["skip", "update"], default="skip")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=settings.IMPORT_HASH_WORKERS, help="Hashing processes")
+    parser.add_argument("--errors", type=Path, help="Write the per-row error report to this NDJSON file")
+    args = parser.parse_args()
+    
+    format = args.format or ("ndjson" if args.path.suffix in (".ndjson", ".jsonl") else "csv")
+    db = SessionLocal()
+    executor = bulk_hash_executor(args.workers)
+    
+    try:
+        with args.path.open("rb") as stream:
+            report = import_users(
+                db,
+                stream,
+                format,
+                executor,
+                on_conflict=args.on_conflict,
+                batch_size=args.batch_size,
+                progress=lambda r: print(
+                    f"[INFO] {r['inserted']} inserted, {r['updated']} updated, "
+                    f"{r['skipped']} skipped, {len(r['errors'])} errors"
+                ),
+            )
+        
+        print(f"[OK] Imported {report['inserted']} new users, updated {report['updated']}, "
+              f"skipped {report['skipped']}")
+        if report["errors"]:
+            print(f"[WARNING] {len(report['errors'])} rows were rejected")
+            if args.errors:
+                with args.errors.open("w") as out:
+                    for error in report["errors"]:
+                        out.write(json.dumps(error) + "\n")
+            else:
+                for error in report["errors"][:20]:
+                    print(f"  line {error['line']}: {error['error']}")
+        
+    except Exception as e:
+        print(f"[ERROR] Error importing users: {e}")
+        sys.exit(1)
+    finally:
+        executor.shutdown()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
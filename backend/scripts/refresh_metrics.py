@@ -0,0 +1,27 @@
+"""
+Script to incrementally refresh the user_metrics_daily rollup
+
+Run it periodically (e.g. every few minutes from cron). Only days touched
+since the previous run are recomputed.
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.database import SessionLocal
+from app.rollups import refresh_user_metrics
+
+db = SessionLocal()
+
+try:
+    written = refresh_user_metrics(db)
+    print(f"[OK] Refreshed {written} days of user metrics!")
+    
+except Exception as e:
+    print(f"[ERROR] Error refreshing user metrics: {e}")
+    db.rollback()
+    sys.exit(1)
+finally:
+    db.close()
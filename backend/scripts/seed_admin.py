@@ -10,7 +10,7 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from app.database import SessionLocal
 from app.models.user import User, UserRole, UserStatus
-from app.auth import get_password_hash
+from app.hashing import get_password_hash
 
 
 def create_admin_user():
@@ -1,42 +1,77 @@
 """
 Script to update existing users with new plan fields
+
+Runs as chunked UPDATE statements over id ranges, so the table is never
+loaded into memory and each transaction stays short.
+
+Usage:
+    python scripts/update_users.py [--chunk-size N]
 """
 import sys
+import argparse
 from pathlib import Path
 from datetime import datetime, timedelta
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from sqlalchemy import case, func, select, update
 from app.database import SessionLocal
 from app.models.user import User
 
+ADMIN_EMAIL = "admin@jiva.com"
+
 reference_names = ["John Smith", "Alice Johnson", "Bob Wilson", "Carol Davis", "David Miller", 
                   "Emma Brown", "Frank Taylor", "Grace Lee", "Henry Anderson", "Iris Martinez",
                   "Jack White", "Karen Harris", "Leo Clark", "Mona Lewis", "Nathan Young"]
 
 days_valid_list = [180, 365, 30, 200, 15, 365, 150, 60, 250, 45, 365, 90, 30, 180, 365]
 
-db = SessionLocal()
-
-try:
-    users = db.query(User).all()
-    updated_count = 0
-    
-    for idx, user in enumerate(users):
-        if user.email != "admin@jiva.com":
-            user.reference = reference_names[idx % len(reference_names)]
-            user.plan_valid_until = datetime.now().date() + timedelta(days=days_valid_list[idx % len(days_valid_list)])
-            updated_count += 1
-        else:
-            user.reference = "System Admin"
-            user.plan_valid_until = datetime.now().date() + timedelta(days=365)
-    
-    db.commit()
-    print(f"[OK] Updated {updated_count} users with plan fields!")
-    
-except Exception as e:
-    print(f"[ERROR] Error updating users: {e}")
-    db.rollback()
-finally:
-    db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill reference and plan_valid_until for all users")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Id range updated per transaction")
+    args = parser.parse_args()
+
+    today = datetime.now().date()
+    # Values cycle through the lists by id, computed by the database
+    slot = User.id % len(reference_names)
+    reference = case({i: name for i, name in enumerate(reference_names)}, value=slot)
+    valid_until = case({i: today + timedelta(days=days) for i, days in enumerate(days_valid_list)}, value=slot)
+
+    db = SessionLocal()
+
+    try:
+        first_id, last_id = db.execute(select(func.min(User.id), func.max(User.id))).one()
+        updated_count = 0
+
+        for start in range(first_id or 0, (last_id or -1) + 1, args.chunk_size):
+            result = db.execute(
+                update(User)
+                .where(User.id >= start, User.id < start + args.chunk_size, User.email != ADMIN_EMAIL)
+                .values(reference=reference, plan_valid_until=valid_until),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+            updated_count += result.rowcount
+            print(f"[INFO] Updated ids {start}..{min(start + args.chunk_size, last_id + 1) - 1}")
+
+        db.execute(
+            update(User)
+            .where(User.email == ADMIN_EMAIL)
+            .values(reference="System Admin", plan_valid_until=today + timedelta(days=365)),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        print(f"[OK] Updated {updated_count} users with plan fields!")
+
+    except Exception as e:
+        print(f"[ERROR] Error updating users: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
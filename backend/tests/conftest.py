@@ -0,0 +1,23 @@
+import os
+import sys
+from pathlib import Path
+import pytest
+
+# Settings require these; tests never connect with them
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on a fresh SQLite database with the full schema"""
+    import app.database as database
+
+    database.configure_database(f"sqlite:///{tmp_path / 'test.db'}")
+    database.Base.metadata.create_all(database.engine)
+    session = database.SessionLocal()
+    yield session
+    session.close()
+    database.engine.dispose()
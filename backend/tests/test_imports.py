@@ -0,0 +1,35 @@
+import io
+import pytest
+from sqlalchemy import text
+from app.hashing import bulk_hash_executor
+from app.imports import import_users
+from app.models.user import User
+
+
+@pytest.fixture
+def executor():
+    pool = bulk_hash_executor(1)
+    yield pool
+    pool.shutdown()
+
+
+def test_rejected_rows_do_not_take_their_batch_with_them(db, executor):
+    db.execute(text(
+        "CREATE TRIGGER reject_import BEFORE INSERT ON users WHEN NEW.email LIKE 'reject%' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected by trigger'); END"
+    ))
+    db.commit()
+    lines = ["name,email,password"] + [
+        f"User {i},{'reject' if i in (3, 7) else 'user'}{i}@example.com,secret{i}" for i in range(10)
+    ]
+    stream = io.BytesIO("\n".join(lines).encode())
+
+    report = import_users(db, stream, "csv", executor, batch_size=10)
+
+    assert report["inserted"] == 8
+    assert report["skipped"] == 0
+    assert [(error["line"], error["email"]) for error in report["errors"]] == [
+        (5, "reject3@example.com"), (9, "reject7@example.com"),
+    ]
+    assert all("rejected by trigger" in error["error"] for error in report["errors"])
+    assert db.query(User).count() == 8
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+import pytest
+from app.api.admin.users import _list_users
+from app.models.user import User
+from app.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def users(db):
+    # Server-default timestamps share one second and are stored without a
+    # fraction; the explicit ones carry SQLAlchemy's fractional format
+    db.add_all(User(name=f"User {i}", email=f"u{i}@example.com", hashed_password="x") for i in range(25))
+    db.flush()
+    stamped = db.get(User, 1).created_at.replace(microsecond=0)
+    db.add_all(User(name=f"Stamped {i}", email=f"s{i}@example.com", hashed_password="x", created_at=stamped)
+               for i in range(6))
+    db.commit()
+
+
+def test_cursor_walk_returns_every_user_once_in_order(db, users):
+    expected = [row.id for row in db.query(User.id).order_by(User.created_at.desc(), User.id.desc())]
+    seen, cursor = [], None
+    for _ in range(len(expected)):
+        _, page = _list_users(db, 1, 7, None, cursor, False)
+        seen.extend(user["id"] for user in page["users"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert cursor is None
+    assert seen == expected
+    assert len(expected) == 31
+
+
+def raw_cursor(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def test_decode_cursor_round_trip():
+    assert decode_cursor(encode_cursor(datetime(2024, 1, 1), 5)) == ("2024-01-01T00:00:00", 5)
+
+
+@pytest.mark.parametrize("row_id", [0, -1, 2**31, 10**30, float("inf"), "x", None])
+def test_decode_cursor_rejects_ids_outside_the_key_range(row_id):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor({"c": "2024-01-01T00:00:00", "i": row_id}))